@@ -1,5 +1,6 @@
 import os
 import asyncio
+import logging
 import uuid
 from typing import Optional
 
@@ -8,13 +9,47 @@ from google.adk.agents import LlmAgent
 from google.adk.tools.retrieval.vertex_ai_rag_retrieval import VertexAiRagRetrieval
 from vertexai.preview import rag
 from google.adk.tools import google_search
-from .prompts import return_instructions_root, retrun_instructions_web_search,return_instructions_rag
+from .prompts import return_instructions_root, retrun_instructions_web_search,return_instructions_rag, return_instructions_keyword_lookup
 from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools import FunctionTool
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
-def create_rag_retrieval_tool(rag_corpus: str) -> VertexAiRagRetrieval:
+from ..config.settings import settings
+from ..retrieval.bm25_index import get_keyword_index
+from ..retrieval.vector_index import get_local_index
+
+logger = logging.getLogger(__name__)
+
+
+def create_local_retrieval_tool(startup_name: str) -> Optional[FunctionTool]:
+    """Same tool, answered from the startup's local vector index; None if it has no documents yet"""
+    index = get_local_index(startup_name)
+    if not len(index):
+        return None
+
+    def retrieve_rag_documentation(query: str) -> dict:
+        """Use this tool to retrieve documentation and reference materials for the question from the startup's documents.
+
+        Args:
+            query: The question or keywords to look up.
+        """
+        return {
+            "results": index.search(query, settings.retrieval.top_k, settings.retrieval.min_similarity)
+        }
+
+    return FunctionTool(retrieve_rag_documentation)
+
+
+def create_rag_retrieval_tool(rag_corpus: str, startup_name: Optional[str] = None):
+    if settings.retrieval.backend == "local" and startup_name:
+        try:
+            local_tool = create_local_retrieval_tool(startup_name)
+            if local_tool is not None:
+                return local_tool
+        except Exception as e:
+            logger.warning(f"Local retrieval unavailable for {startup_name}, using the RAG corpus: {str(e)}")
     return VertexAiRagRetrieval(
         name='retrieve_rag_documentation',
         description=(
@@ -29,8 +64,56 @@ def create_rag_retrieval_tool(rag_corpus: str) -> VertexAiRagRetrieval:
         vector_distance_threshold=0.6,
     )
 
-def create_analysis_agents(rag_corpus: str, model_name: str = "gemini-2.5-flash"):
-    ask_vertex_retrieval = create_rag_retrieval_tool(rag_corpus)
+def create_keyword_lookup_tool(startup_name: str) -> Optional[FunctionTool]:
+    """Exact-match BM25 lookups over the startup's extracted documents; None if it has none yet"""
+    index = get_keyword_index(startup_name)
+    if not len(index):
+        return None
+
+    def lookup_exact_figures(query: str) -> dict:
+        """Use this tool to find exact figures, amounts and names in the startup's documents by keyword match,
+        e.g. revenue, ARR, valuation, round size, burn, CAC/LTV or amounts such as "₹12 Cr". Prefer it over
+        retrieve_rag_documentation when looking for a specific number or term.
+
+        Args:
+            query: Keywords, figures or names to look for, e.g. "ARR FY24" or "pre-money valuation ₹ Cr".
+        """
+        return {"results": index.search(query, settings.retrieval.top_k)}
+
+    return FunctionTool(lookup_exact_figures)
+
+
+def create_retrieval_tools(rag_corpus: str, startup_name: Optional[str] = None, model_name: str = "gemini-2.5-flash"):
+    """Tools for the agent that retrieves from the startup's documents, and for its parent agent.
+
+    Returns (tools, parent_tools). The keyword lookup tool (when enabled and the startup has
+    extracted documents) joins the local retrieval tool directly. VertexAiRagRetrieval is a
+    built-in tool on Gemini 2 models and stays the only tool on its agent; the keyword lookup
+    then runs in its own keyword_lookup_agent, exposed to the parent through an AgentTool.
+    """
+    retrieval_tool = create_rag_retrieval_tool(rag_corpus, startup_name)
+    keyword_tool = None
+    if settings.retrieval.keyword_lookup and startup_name:
+        try:
+            keyword_tool = create_keyword_lookup_tool(startup_name)
+        except Exception as e:
+            logger.warning(f"Keyword lookup unavailable for {startup_name}: {str(e)}")
+    if keyword_tool is None:
+        return [retrieval_tool], []
+    if not isinstance(retrieval_tool, VertexAiRagRetrieval):
+        return [retrieval_tool, keyword_tool], []
+
+    keyword_lookup_agent = Agent(
+        model=model_name,
+        name="keyword_lookup_agent",
+        description="Looks up exact figures, amounts and names (revenue, ARR, valuation, round size, burn) in the startup's uploaded documents. Prefer it when looking for a specific number or term.",
+        instruction=return_instructions_keyword_lookup(),
+        tools=[keyword_tool],
+    )
+    return [retrieval_tool], [AgentTool(agent=keyword_lookup_agent)]
+
+def create_analysis_agents(rag_corpus: str, model_name: str = "gemini-2.5-flash", startup_name: Optional[str] = None):
+    retrieval_tools, keyword_tools = create_retrieval_tools(rag_corpus, startup_name, model_name)
     
     websearch_agent = Agent(
         model=model_name,
@@ -45,9 +128,7 @@ def create_analysis_agents(rag_corpus: str, model_name: str = "gemini-2.5-flash"
         model=model_name,
         name='rag_agent',
         instruction=return_instructions_rag(),
-        tools=[
-            ask_vertex_retrieval,
-        ]
+        tools=retrieval_tools,
     )
 
     root_agent = Agent(
@@ -58,6 +139,7 @@ def create_analysis_agents(rag_corpus: str, model_name: str = "gemini-2.5-flash"
         tools=[
             AgentTool(agent=rag_agent),
             AgentTool(agent=websearch_agent),
+            *keyword_tools,
         ]
     )
     
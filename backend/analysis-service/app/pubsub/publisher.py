@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from google.cloud import pubsub_v1
 from google.cloud.exceptions import NotFound
@@ -11,13 +11,23 @@ logger = logging.getLogger(__name__)
 
 
 class PubSubPublisher:
-    def __init__(self):
-        self.publisher_client = pubsub_v1.PublisherClient()
+    def __init__(self, ensure_topic: bool = True):
+        batch_settings = pubsub_v1.types.BatchSettings(
+            max_messages=settings.pubsub.batch_max_messages,
+            max_bytes=settings.pubsub.batch_max_bytes,
+            max_latency=settings.pubsub.batch_max_latency,
+        )
+        # Progress and result messages of one upload share its upload_id as ordering key
+        publisher_options = pubsub_v1.types.PublisherOptions(enable_message_ordering=True)
+        self.publisher_client = pubsub_v1.PublisherClient(
+            batch_settings=batch_settings, publisher_options=publisher_options
+        )
         self.topic_path = self.publisher_client.topic_path(
             settings.gcp.project_id, settings.gcp.output_topic_name
         )
-        # Ensure topic exists (create if missing)
-        self._ensure_topic_exists()
+        # Ensure topic exists (create if missing); worker subprocesses skip this, the service checked at startup
+        if ensure_topic:
+            self._ensure_topic_exists()
 
     def _ensure_topic_exists(self):
         try:
@@ -30,12 +40,19 @@ class PubSubPublisher:
             logger.error(f"Error checking/creating topic: {str(e)}")
             raise e
 
-    def publish_result(self, result_data: Dict[str, Any]) -> bool:
-        """Publish analysis results to the output topic"""
+    def publish_result(self, result_data: Dict[str, Any], wait: bool = True) -> bool:
+        """
+        Publish analysis results to the output topic. With wait=False the message is
+        queued into the current batch and the outcome is only logged from its callback.
+        """
+        ordering_key = result_data.get("upload_id") or ""
         try:
             message_data = json.dumps(result_data).encode('utf-8')
             
-            future = self.publisher_client.publish(self.topic_path, message_data)
+            future = self.publisher_client.publish(self.topic_path, message_data, ordering_key=ordering_key)
+            if not wait:
+                future.add_done_callback(lambda f: self._log_publish_outcome(f, ordering_key))
+                return True
             message_id = future.result()
             
             logger.info(f"Published result message with ID: {message_id}")
@@ -43,8 +60,35 @@ class PubSubPublisher:
             
         except Exception as e:
             logger.error(f"Failed to publish result: {str(e)}")
+            self._resume(ordering_key)
             return False
 
+    def _log_publish_outcome(self, future, ordering_key: str) -> None:
+        try:
+            logger.info(f"Published message with ID: {future.result()}")
+        except Exception as e:
+            logger.error(f"Failed to publish message: {str(e)}")
+            self._resume(ordering_key)
+
+    def _resume(self, ordering_key: str) -> None:
+        """A failed publish pauses its ordering key; resume it so later messages can go out"""
+        if ordering_key:
+            try:
+                self.publisher_client.resume_publish(self.topic_path, ordering_key)
+            except Exception as e:
+                logger.error(f"Failed to resume ordering key {ordering_key}: {str(e)}")
+
+    def publish_progress(self, progress_data: Dict[str, Any]) -> bool:
+        """Publish an intermediate progress event (e.g. a finished section) without waiting for it"""
+        return self.publish_result(dict(progress_data, status="progress"), wait=False)
+
+    def flush(self) -> None:
+        """Send any batched messages and wait for them; call before the process exits"""
+        try:
+            self.publisher_client.stop()
+        except Exception as e:
+            logger.error(f"Failed to flush publisher: {str(e)}")
+
     def publish_error(self, error_data: Dict[str, Any]) -> bool:
         """Publish error information to the output topic"""
         error_message = {
@@ -52,7 +96,25 @@ class PubSubPublisher:
             "timestamp": error_data.get("timestamp"),
             "error": error_data.get("error"),
             "startup_name": error_data.get("startup_name"),
+            "upload_id": error_data.get("upload_id"),
+            "service_name": error_data.get("service_name"),
             "request_id": error_data.get("request_id")
         }
         
         return self.publish_result(error_message)
+
+
+# One publisher (and gRPC channel) per process, shared by every message it handles
+_publisher: Optional[PubSubPublisher] = None
+
+
+def get_publisher(ensure_topic: bool = True) -> PubSubPublisher:
+    global _publisher
+    if _publisher is None:
+        _publisher = PubSubPublisher(ensure_topic=ensure_topic)
+    return _publisher
+
+
+def flush_publisher() -> None:
+    if _publisher is not None:
+        _publisher.flush()
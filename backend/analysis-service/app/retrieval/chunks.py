@@ -0,0 +1,50 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List
+
+# Written by data-manager: {startup}/extracted/<sha256>.json.gz
+EXTRACTED_DIR = "extracted"
+
+
+def list_extractions(bucket, startup_name: str) -> Dict[str, int]:
+    """{blob name: generation} of every extracted document of the startup"""
+    return {
+        b.name: b.generation
+        for b in bucket.list_blobs(prefix=f"{startup_name}/{EXTRACTED_DIR}/")
+        if b.name.endswith(".json.gz") and not b.name.endswith("page_signatures.json.gz")
+    }
+
+
+def chunk_extraction(extraction: Dict[str, Any], chunk_words: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+    """Overlapping word windows per page, plus one chunk per table"""
+    texts = []
+    step = max(1, chunk_words - chunk_overlap)
+    for page in extraction.get("pages", []):
+        words = page.get("text", "").split()
+        for start in range(0, len(words), step):
+            texts.append((" ".join(words[start:start + chunk_words]), page.get("number")))
+            if start + chunk_words >= len(words):
+                break
+    for table in extraction.get("tables", []):
+        texts.append(("\n".join(" | ".join(row) for row in table.get("rows", [])), table.get("page")))
+
+    return [
+        {
+            "hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "text": text,
+            "source": extraction.get("name"),
+            "page": page,
+        }
+        for text, page in texts if text.strip()
+    ]
+
+
+def load_chunks(bucket, blob_names, chunk_words: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+    """Chunks of the given extractions; identical text (the same deck uploaded twice) appears once"""
+    chunks: Dict[str, Dict[str, Any]] = {}
+    for blob_name in blob_names:
+        extraction = json.loads(gzip.decompress(bucket.blob(blob_name).download_as_bytes()))
+        for chunk in chunk_extraction(extraction, chunk_words, chunk_overlap):
+            chunks.setdefault(chunk["hash"], chunk)
+    return list(chunks.values())
@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(ABC):
+    """Turns texts into L2-normalised float32 vectors of a fixed dimension.
+
+    name identifies the model; vectors from different embedders are never mixed.
+    """
+
+    name: str = ""
+    dim: int = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """One row per text, L2-normalised."""
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class VertexEmbedder(Embedder):
+    """Vertex AI text embeddings (the model the RAG corpora are built with)"""
+
+    def __init__(self, model_name: str = "text-embedding-004", batch_size: int = 100, dim: int = 768):
+        from vertexai.language_models import TextEmbeddingModel
+
+        self.model = TextEmbeddingModel.from_pretrained(model_name)
+        self.name = model_name
+        self.batch_size = batch_size
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            vectors.extend(e.values for e in self.model.get_embeddings(batch))
+        return self._normalise(np.array(vectors, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic, dependency-free embedder (hashed word unigrams and bigrams).
+
+    Good enough for keyword-style lookups and for tests; no network calls.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+
+    def _index(self, feature: str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little") % self.dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                vectors[row, self._index(feature)] += 1.0
+        return self._normalise(vectors)
+
+
+# name -> factory(model_name); register_embedder() plugs in others
+_EMBEDDERS: Dict[str, Callable[[str], Embedder]] = {
+    "vertex": lambda model_name: VertexEmbedder(model_name),
+    "hashing": lambda model_name: HashingEmbedder(),
+}
+
+
+def register_embedder(name: str, factory: Callable[[str], Embedder]) -> None:
+    _EMBEDDERS[name] = factory
+
+
+def get_embedder(name: str, model_name: str) -> Embedder:
+    try:
+        return _EMBEDDERS[name](model_name)
+    except KeyError:
+        raise ValueError(f"Unknown embedder '{name}', expected one of {sorted(_EMBEDDERS)}")
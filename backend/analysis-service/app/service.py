@@ -4,6 +4,7 @@ import sys
 
 from .config.settings import settings
 from .pubsub.subscriber import PubSubSubscriber
+from .pubsub.publisher import flush_publisher
 from .utils.logging import setup_logging, get_logger
 
 logger = get_logger(__name__)
@@ -44,6 +45,7 @@ class AnalysisService:
         if self.running:
             logger.info("Stopping Analysis Service...")
             self.running = False
+            flush_publisher()
 
     def _signal_handler(self, signum, frame):
         logger.info(f"Received signal {signum}, shutting down gracefully...")
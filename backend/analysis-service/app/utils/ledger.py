@@ -0,0 +1,77 @@
+import json
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from google.cloud import storage
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+logger = logging.getLogger(__name__)
+
+CLAIMED = "claimed"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+class StageLedger:
+    """Dedupe ledger of processed (upload_id, stage) pairs, one marker object per pair
+    (<prefix>/<upload_id>/<stage>.json), shared with data-manager so that Pub/Sub
+    redeliveries and duplicate requests never run the same stage twice."""
+
+    def __init__(self, bucket_name: str, prefix: str, ttl_seconds: int, lease_seconds: int, max_attempts: int = 10):
+        self.storage_client = storage.Client()
+        self.bucket = self.storage_client.bucket(bucket_name)
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _blob_name(self, upload_id: str, stage: str) -> str:
+        return f"{self.prefix}/{upload_id}/{stage}.json"
+
+    def claim(self, upload_id: str, stage: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Take ownership of (upload_id, stage).
+
+        Returns (CLAIMED, entry) when the caller should run the stage, otherwise
+        (COMPLETED or IN_PROGRESS, entry) as stored by the current holder. Markers
+        past their expiry (a crashed holder, an old completion) are taken over; the
+        write is conditional so exactly one consumer wins a race.
+        """
+        blob_name = self._blob_name(upload_id, stage)
+        for _ in range(self.max_attempts):
+            now = time.time()
+            blob = self.bucket.get_blob(blob_name)
+            if blob is not None:
+                try:
+                    entry = json.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+                except (NotFound, PreconditionFailed):
+                    continue
+                if entry.get("expires_at", 0) > now:
+                    return entry.get("status"), entry
+
+            entry = {"status": IN_PROGRESS, "expires_at": now + self.lease_seconds}
+            try:
+                self.bucket.blob(blob_name).upload_from_string(
+                    json.dumps(entry),
+                    content_type="application/json",
+                    if_generation_match=blob.generation if blob else 0,
+                )
+                return CLAIMED, entry
+            except PreconditionFailed:
+                logger.info(f"Ledger entry {blob_name} changed concurrently, re-reading")
+        return IN_PROGRESS, None
+
+    def complete(self, upload_id: str, stage: str, **result: Any) -> Dict[str, Any]:
+        """Mark the stage done; duplicates are skipped until the TTL runs out"""
+        entry = dict(result, status=COMPLETED, expires_at=time.time() + self.ttl_seconds)
+        self.bucket.blob(self._blob_name(upload_id, stage)).upload_from_string(
+            json.dumps(entry), content_type="application/json"
+        )
+        return entry
+
+    def release(self, upload_id: str, stage: str) -> None:
+        """Drop a claim after a failure so a later request can run the stage again"""
+        try:
+            self.bucket.blob(self._blob_name(upload_id, stage)).delete()
+        except NotFound:
+            pass
@@ -1,3 +1,4 @@
+import ipaddress
 import os
 
 PROJECT_ID = os.getenv("GCP_PROJECT", "aianalyst-redflaggers")
@@ -6,6 +7,92 @@ GOOGLE_CLOUD_LOCATION=os.getenv("GOOGLE_CLOUD_LOCATION","europe-west3")
 CORPUS_ID = os.getenv("CORPUS_ID","projects/aianalyst-redflaggers/locations/europe-west3/ragCorpora/2305843009213693952")
 CORPUS_DISPLAY_NAME = os.getenv("CORPUS_DISPLAY_NAME", "startup-docs")
 
+# Uploads are read, hashed and spooled in chunks of this size (bytes)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# Extracted archive members are uploaded in parallel over a shared connection pool
+GCS_UPLOAD_CONCURRENCY = int(os.getenv("GCS_UPLOAD_CONCURRENCY", "8"))
+GCS_UPLOAD_RETRY_DEADLINE = float(os.getenv("GCS_UPLOAD_RETRY_DEADLINE", "120"))
+# Event-loop GCS access (status, manifests, indexes, chunks): concurrent requests and idle keep-alive seconds
+GCS_ASYNC_CONCURRENCY = int(os.getenv("GCS_ASYNC_CONCURRENCY", "64"))
+GCS_ASYNC_KEEPALIVE = float(os.getenv("GCS_ASYNC_KEEPALIVE", "30"))
+
+# "stream" pipes archive members straight into GCS; "disk" extracts to a temp dir first
+ARCHIVE_EXTRACT_MODE = os.getenv("ARCHIVE_EXTRACT_MODE", "stream")
+GCS_STREAM_CHUNK_SIZE = int(os.getenv("GCS_STREAM_CHUNK_SIZE", str(8 * 1024 * 1024)))  # multiple of 256 KiB
+ARCHIVE_MAX_TOTAL_SIZE = int(os.getenv("ARCHIVE_MAX_TOTAL_SIZE", str(2 * 1024 * 1024 * 1024)))
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "1000"))
+ARCHIVE_MAX_COMPRESSION_RATIO = float(os.getenv("ARCHIVE_MAX_COMPRESSION_RATIO", "100"))
+
+# Pub/Sub publishing: one batching client per process; a batch is sent when any limit is reached
+PUBSUB_BATCH_MAX_MESSAGES = int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", "100"))
+PUBSUB_BATCH_MAX_BYTES = int(os.getenv("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024)))
+PUBSUB_BATCH_MAX_LATENCY = float(os.getenv("PUBSUB_BATCH_MAX_LATENCY", "0.01"))  # seconds
+
+# Upload/job tracking shared by all gateway workers: "sqlite" (single node) or "redis" (cluster)
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "sqlite")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "/tmp/api-gateway-jobs.db")
+JOB_STORE_REDIS_URL = os.getenv("JOB_STORE_REDIS_URL", "redis://localhost:6379/0")
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Identical re-uploads (same startup, same archive MD5) reuse earlier report artifacts
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "10000"))
+
+# Subscriptions on the analysis/infographic output topics; when set, status is answered from the job store only
+# (a subscription on retrieve-data may be added to surface the "imported" stage)
+RESULT_SUBSCRIPTIONS = [s for s in os.getenv("RESULT_SUBSCRIPTIONS", "").split(",") if s]
+
+# Server-sent job progress: how often the stream re-reads the job store, and keep-alive interval
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "1"))
+JOB_EVENTS_HEARTBEAT_INTERVAL = float(os.getenv("JOB_EVENTS_HEARTBEAT_INTERVAL", "15"))
+# Without RESULT_SUBSCRIPTIONS the stream reads the completion manifest this often (seconds)
+JOB_EVENTS_MANIFEST_INTERVAL = float(os.getenv("JOB_EVENTS_MANIFEST_INTERVAL", "5"))
+
+# Most upload_ids accepted by one /status/bulk/ request
+BULK_STATUS_MAX_IDS = int(os.getenv("BULK_STATUS_MAX_IDS", "500"))
+# Unfinished uploads whose manifests are found with one object listing (a matchGlob over their names)
+MANIFEST_LIST_BATCH_SIZE = int(os.getenv("MANIFEST_LIST_BATCH_SIZE", "100"))
+
+# Admission control on /upload/: jobs in flight at once, overall and per client (0 disables a limit).
+# Slots of jobs that never report back are reclaimed after the timeout (direct and chunked uploads
+# hold theirs only for DIRECT_UPLOAD_URL_EXPIRY until finalized); the default job duration
+# seeds the Retry-After estimate until real job durations have been observed.
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "20"))
+ADMISSION_MAX_INFLIGHT_PER_CLIENT = int(os.getenv("ADMISSION_MAX_INFLIGHT_PER_CLIENT", "3"))
+ADMISSION_JOB_TIMEOUT_SECONDS = int(os.getenv("ADMISSION_JOB_TIMEOUT_SECONDS", "3600"))
+ADMISSION_DEFAULT_JOB_SECONDS = float(os.getenv("ADMISSION_DEFAULT_JOB_SECONDS", "300"))
+# Clients are keyed by peer address; X-Forwarded-For is only honoured from these proxies (IPs or CIDRs)
+ADMISSION_TRUSTED_PROXIES = [
+    ipaddress.ip_network(p.strip()) for p in os.getenv("ADMISSION_TRUSTED_PROXIES", "").split(",") if p.strip()
+]
+# Without RESULT_SUBSCRIPTIONS, slots of finished jobs are found from their manifests this often (seconds)
+ADMISSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("ADMISSION_SWEEP_INTERVAL_SECONDS", "30"))
+
+# Direct-to-bucket uploads: clients PUT archives to a "signed" V4 URL or a "resumable" session URL
+# under DIRECT_UPLOAD_PREFIX, then call /upload/finalize/. Against a local fake GCS server
+# (STORAGE_EMULATOR_HOST) nothing can be signed, so resumable sessions are always used there.
+STORAGE_EMULATOR_HOST = os.getenv("STORAGE_EMULATOR_HOST")
+DIRECT_UPLOAD_MODE = "resumable" if STORAGE_EMULATOR_HOST else os.getenv("DIRECT_UPLOAD_MODE", "signed")
+DIRECT_UPLOAD_PREFIX = os.getenv("DIRECT_UPLOAD_PREFIX", "incoming")
+DIRECT_UPLOAD_URL_EXPIRY = int(os.getenv("DIRECT_UPLOAD_URL_EXPIRY", "900"))
+DIRECT_UPLOAD_ORIGIN = os.getenv("DIRECT_UPLOAD_ORIGIN") or None  # browser origin allowed on resumable sessions
+
+# Resumable chunked uploads: fixed-size chunks (last may be shorter) are stored as objects
+# under CHUNKED_UPLOAD_PREFIX and composed into one archive on finalize.
+CHUNKED_UPLOAD_PREFIX = os.getenv("CHUNKED_UPLOAD_PREFIX", "chunks")
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv("CHUNKED_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv("CHUNKED_UPLOAD_MAX_SIZE", str(5 * 1024 * 1024 * 1024)))
+# Finalize waits this long (seconds) for chunk writes that started before it claimed the upload
+CHUNKED_UPLOAD_WRITE_TIMEOUT = float(os.getenv("CHUNKED_UPLOAD_WRITE_TIMEOUT", "60"))
+
+# Chunk and direct-upload objects of uploads left idle this long (seconds), or whose job record
+# has expired, are deleted by a sweep every ABANDONED_UPLOAD_SWEEP_INTERVAL_SECONDS
+ABANDONED_UPLOAD_SECONDS = int(os.getenv("ABANDONED_UPLOAD_SECONDS", str(24 * 3600)))
+ABANDONED_UPLOAD_SWEEP_INTERVAL_SECONDS = float(os.getenv("ABANDONED_UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+
 STARTUP_NAME = "Inlustro_Demo"
 ZIP_MD5 = "0464abac7076e5079531c36883d0c81f"
 PDF_URL = "https://storage.googleapis.com/pitchdeck-storage-289/analysis_reports/InLustro_85c2f6af-e2bd-4836-8068-70e9211849a7_analysis.pdf"
@@ -1,8 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routers import Routers
 from fastapi.middleware.cors import CORSMiddleware
+from services.result_subscriber import start_result_subscriber, stop_result_subscriber
+from services.async_storage import close_async_storage
+from services.pubsub_utils import shutdown_publisher
+from services.metrics import MetricsMiddleware, metrics_app
+from config import RESULT_SUBSCRIPTIONS
 
-app = FastAPI(title="AI Analyst API Gateway")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_result_subscriber()
+    sweeper = None if RESULT_SUBSCRIPTIONS else asyncio.create_task(Routers.run_admission_sweeper())
+    upload_sweeper = asyncio.create_task(Routers.run_abandoned_upload_sweeper())
+    yield
+    if sweeper is not None:
+        sweeper.cancel()
+    upload_sweeper.cancel()
+    stop_result_subscriber()
+    shutdown_publisher()
+    await close_async_storage()
+
+
+app = FastAPI(title="AI Analyst API Gateway", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -18,6 +40,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "Upload-Offset", "Upload-Length"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(Routers.router)
+app.mount("/metrics", metrics_app())
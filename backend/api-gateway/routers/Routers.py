@@ -1,109 +1,712 @@
 import uuid
+import json
+import base64
 import hashlib
-from fastapi import APIRouter, UploadFile, Form, Query
-from services.gcs_service import extract_and_upload_file_to_gcs, bucket, BUCKET_NAME
+import time
+import asyncio
+import ipaddress
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Form, Query, Body, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, JSONResponse
+from typing import List, Optional
+from google.api_core.exceptions import NotFound
+from services.gcs_service import (
+    extract_and_upload_file_to_gcs, spool_upload, read_manifest, read_manifests, ArchiveLimitError, MalformedUploadError,
+    direct_upload_blob_name, create_direct_upload, spool_blob, delete_blob,
+    upload_chunk, compose_chunks, list_upload_objects,
+)
 from services.pubsub_utils import publish_message
-from config import STARTUP_NAME, ZIP_MD5, PDF_URL, IMAGE_URL
+from services.job_store import job_store, job_finished
+from services.report_cache import report_cache
+from services.admission import admission, AdmissionRejected
+from services import metrics
+from config import (
+    RESULT_SUBSCRIPTIONS, CHUNKED_UPLOAD_CHUNK_SIZE, CHUNKED_UPLOAD_MAX_SIZE,
+    JOB_EVENTS_POLL_INTERVAL, JOB_EVENTS_HEARTBEAT_INTERVAL, JOB_EVENTS_MANIFEST_INTERVAL, BULK_STATUS_MAX_IDS,
+    DIRECT_UPLOAD_URL_EXPIRY, ADMISSION_TRUSTED_PROXIES, ADMISSION_SWEEP_INTERVAL_SECONDS,
+    CHUNKED_UPLOAD_WRITE_TIMEOUT, ABANDONED_UPLOAD_SECONDS, ABANDONED_UPLOAD_SWEEP_INTERVAL_SECONDS,
+)
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(metrics.label_endpoint)])
 TOPIC_ID = "manage-data"
 
-upload_id_to_startup = {}
-upload_ids = set()
 
-def _md5_bytes(data: bytes) -> str:
-    h = hashlib.md5()
-    h.update(data)
-    return h.hexdigest()
+def _get_job(upload_id: str) -> dict:
+    job = job_store.get(upload_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload_id {upload_id}")
+    return job
 
-@router.post("/upload/")
-async def upload_startup_docs(
-    startup_name: str = Form(...),
-    file: UploadFile = None
-):
-    if not file:
-        return {"error": "No file provided"}
-    # Read file once to compute MD5; reset pointer
-    raw = await file.read()
-    file_md5 = _md5_bytes(raw)
-    file.file.seek(0)
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in ADMISSION_TRUSTED_PROXIES)
 
-    upload_id = str(uuid.uuid4())
-    upload_id_to_startup[upload_id]=startup_name
 
-    if (startup_name == STARTUP_NAME) and (file_md5 == ZIP_MD5):
-        upload_ids.add(upload_id)
+def _client_id(request: Request) -> str:
+    """
+    Clients are told apart by network address, never by what they claim about themselves:
+    the peer address, or, when the peer is one of ADMISSION_TRUSTED_PROXIES, the nearest
+    X-Forwarded-For hop that is not (entries further left are client-supplied).
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return peer
+
+
+async def _admit(upload_id: str, client_id: str, hold_seconds: int = None):
+    """
+    Backpressure: refuse new work while too many jobs are in flight. A slot the upload
+    already holds is renewed for hold_seconds (default ADMISSION_JOB_TIMEOUT_SECONDS).
+    """
+    try:
+        await run_in_threadpool(admission.admit, upload_id, client_id, hold_seconds)
+    except AdmissionRejected as e:
+        print(f"🚦 Upload rejected for client {client_id}: {e.reason} (retry in {e.retry_after}s)")
+        raise HTTPException(status_code=429, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
+
+
+def _fail_job(upload_id: str, error: str):
+    admission.release(job_store.update(upload_id, stage="failed", error=error))
+
+
+async def _ingest_archive(upload_id: str, startup_name: str, filename: str, archive_path: str, file_md5: str) -> dict:
+    """Shared ingestion path for a spooled archive: report cache, extraction, then the manage-data publish."""
+    # Identical archive already analysed for this startup: reuse its artifacts
+    cached = await run_in_threadpool(report_cache.lookup, startup_name, file_md5)
+    if cached:
+        endpoint = metrics.current_endpoint()
+        (metrics.DEMO_SHORTCUT_HITS if cached.get("upload_id") is None else metrics.CACHE_HITS).labels(endpoint).inc()
+        job = await run_in_threadpool(
+            job_store.update, upload_id, stage="completed", archive_md5=file_md5,
+            pdf_url=cached["pdf_url"], image_urls=cached["image_urls"],
+            cached_from=cached.get("upload_id") or "pinned",
+        )
+        await run_in_threadpool(admission.release, job)
         return {
             "message": "Files uploaded successfully",
             "upload_id": upload_id,
-            "files": []  
+            "files": [],
+            "cached": True
         }
+    await run_in_threadpool(job_store.update, upload_id, archive_md5=file_md5, received_at=time.time())
+
+    try:
+        with metrics.timed(metrics.EXTRACTION_SECONDS):
+            documents = await extract_and_upload_file_to_gcs(archive_path, filename, startup_name, upload_id)
+    except ArchiveLimitError as e:
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise HTTPException(status_code=413, detail=str(e))
+
+    new_documents = [d for d in documents if not d["reused"]]
+    uploaded_paths = [d["gcs_path"] for d in new_documents]
 
-    uploaded_paths = await extract_and_upload_file_to_gcs(file, startup_name, upload_id)
+    await run_in_threadpool(job_store.update, upload_id, stage="uploaded", files=uploaded_paths)
 
-    # 2. Publish to Pub/Sub
+    publish_histogram = metrics.PUBLISH_SECONDS.labels(metrics.current_endpoint())
+    publish_start = time.perf_counter()
+
+    def _on_published(future):
+        publish_histogram.observe(time.perf_counter() - publish_start)
+        # Publishing is not awaited; a message that never got out means the job cannot progress
+        if future.exception() is not None:
+            _fail_job(upload_id, f"Could not hand off to {TOPIC_ID}: {future.exception()}")
+
+    # 2. Publish to Pub/Sub; only new documents need importing into the corpus
     publish_message(TOPIC_ID,{
         "gcs_path": uploaded_paths,
+        "documents": [{"gcs_path": d["gcs_path"], "sha256": d["sha256"], "name": d["name"]} for d in new_documents],
+        "existing_paths": sorted({d["gcs_path"] for d in documents if d["reused"]}),
         "startup_name": startup_name,
         "upload_id": upload_id
-    })
+    }, on_done=_on_published, ordering_key=upload_id)
     return {
         "message": "Files uploaded successfully",
         "upload_id": upload_id,
-        "files": uploaded_paths
+        "files": uploaded_paths,
+        "reused_files": [d["gcs_path"] for d in documents if d["reused"]]
     }
-    
-@router.get("/status/pdf/")
-def check_status(upload_id: str = Query(...)):
+
+
+_UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["startup_name", "file"],
+            "properties": {"startup_name": {"type": "string"}, "file": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+
+@router.post("/upload/", openapi_extra=_UPLOAD_FORM_SCHEMA)
+async def upload_startup_docs(request: Request):
     """
-    Check if analysis PDF is ready in GCS.
+    Multipart form with startup_name and file (.pdf, .zip or .tar(.gz)). The body is
+    parsed here rather than by FastAPI so that the file is hashed and spooled in one pass.
     """
-    print(upload_id)
-    if upload_id in upload_ids:
-        print("Present")
-        return {
-            "status": "completed",
-            "download_url": PDF_URL
-        }
+    upload_id = str(uuid.uuid4())
+    client_id = _client_id(request)
+    # Decided before any of the body is read, so a rejected burst costs no bandwidth or disk
+    await _admit(upload_id, client_id)
+    await run_in_threadpool(job_store.create, upload_id, stage="receiving", client_id=client_id)
 
-    startup_name=upload_id_to_startup[upload_id]
-    result_blob = f"analysis_reports/{startup_name}_{upload_id}_analysis.pdf"
-    if bucket.blob(result_blob).exists():
-        return {
-            "status": "completed",
-            "download_url": f"https://storage.googleapis.com/{BUCKET_NAME}/{result_blob}"
-        }
-    print("Processing")
+    try:
+        # Single pass over the upload: chunks are hashed and spooled to disk together
+        with metrics.UPLOADS_IN_FLIGHT.labels(metrics.current_endpoint()).track_inprogress():
+            async with spool_upload(request) as (fields, filename, archive_path, file_md5):
+                startup_name = fields.get("startup_name")
+                if not startup_name:
+                    raise MalformedUploadError("startup_name is required")
+                if not filename:
+                    await run_in_threadpool(_fail_job, upload_id, "No file provided")
+                    return {"error": "No file provided"}
+                await run_in_threadpool(job_store.update, upload_id, startup_name=startup_name)
+                return await _ingest_archive(upload_id, startup_name, filename, archive_path, file_md5)
+    except MalformedUploadError as e:
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        # The job never reached the workers, so its admission slot is freed right away
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise
+
+
+@router.post("/upload/direct/")
+async def create_direct_upload_url(
+    request: Request,
+    startup_name: str = Form(...),
+    filename: str = Form(...),
+    content_type: str = Form("application/octet-stream"),
+    size: Optional[int] = Form(None),
+):
+    """
+    Direct-to-bucket upload: returns an upload_id and a URL the client writes the
+    archive to itself. Call /upload/finalize/ once the bytes are in the bucket.
+    """
+    if not filename.endswith((".pdf", ".zip", ".tar", ".tar.gz", ".tgz")):
+        raise HTTPException(status_code=400, detail="File must be .pdf, .zip or .tar(.gz)")
+
+    upload_id = str(uuid.uuid4())
+    client_id = _client_id(request)
+    # Held only as long as the upload URL is valid; /upload/finalize/ takes it for the job
+    await _admit(upload_id, client_id, DIRECT_UPLOAD_URL_EXPIRY)
+    blob_name = direct_upload_blob_name(upload_id, filename)
+    await run_in_threadpool(
+        job_store.create, upload_id, startup_name=startup_name, stage="awaiting_upload", client_id=client_id,
+        upload_mode="direct", filename=filename, direct_blob=blob_name,
+    )
+
+    try:
+        target = await run_in_threadpool(create_direct_upload, blob_name, content_type, size)
+    except Exception as e:
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise
+    return {"upload_id": upload_id, **target}
+
+
+def _claim_for_finalize(upload_id: str, upload_mode: str) -> dict:
+    job = _get_job(upload_id)
+    if job.get("upload_mode") != upload_mode:
+        raise HTTPException(status_code=400, detail=f"Upload {upload_id} is not a {upload_mode} upload")
+    # Conditional update: of concurrent finalize calls, exactly one moves the upload on
+    claimed = job_store.update_if_stage(upload_id, "awaiting_upload", stage="receiving")
+    if claimed is None:
+        stage = (job_store.get(upload_id) or job).get("stage")
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is already {stage}")
+    return claimed
+
+
+async def _admit_claimed(upload_id: str, job: dict):
+    """Take the job's slot for processing (renewing the upload's); a refused upload goes back to awaiting_upload."""
+    try:
+        await _admit(upload_id, job["client_id"])
+    except HTTPException:
+        await run_in_threadpool(job_store.update, upload_id, stage="awaiting_upload")
+        raise
+
+
+async def _ingest_bucket_object(upload_id: str, job: dict, blob_name: str) -> dict:
+    """Spool an archive the client put in the bucket and ingest it, then drop the object."""
+    received = False
+    try:
+        with metrics.UPLOADS_IN_FLIGHT.labels(metrics.current_endpoint()).track_inprogress():
+            async with spool_blob(blob_name) as (archive_path, file_md5):
+                received = True
+                return await _ingest_archive(upload_id, job["startup_name"], job["filename"], archive_path, file_md5)
+    except NotFound as e:
+        if received:
+            await run_in_threadpool(_fail_job, upload_id, str(e))
+            raise
+        # Nothing written yet: let the client finish (or resume) its upload and finalize again
+        await run_in_threadpool(job_store.update, upload_id, stage="awaiting_upload")
+        await run_in_threadpool(admission.admit, upload_id, job["client_id"], DIRECT_UPLOAD_URL_EXPIRY)
+        raise HTTPException(status_code=409, detail=f"No upload received for {upload_id}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise
+    finally:
+        # Ingested (or rejected) archives are not needed in the bucket any more
+        if received:
+            await delete_blob(blob_name)
+
+
+@router.post("/upload/finalize/")
+async def finalize_direct_upload(upload_id: str = Form(...)):
+    """
+    Ingest an archive the client wrote straight to the bucket: the same extraction,
+    report cache and manage-data publish as /upload/.
+    """
+    job = await run_in_threadpool(_claim_for_finalize, upload_id, "direct")
+    await _admit_claimed(upload_id, job)
+    return await _ingest_bucket_object(upload_id, job, job["direct_blob"])
+
+
+def _received_chunks(job: dict) -> dict:
+    """{offset: length} of the chunks stored so far."""
+    return {int(k.split(":", 1)[1]): v for k, v in job.items() if k.startswith("chunk:")}
+
+
+def _chunk_offsets(job: dict) -> list:
+    return list(range(0, job["size"], job["chunk_size"]))
+
+
+def _chunk_state(job: dict) -> dict:
+    received = _received_chunks(job)
+    missing = [offset for offset in _chunk_offsets(job) if offset not in received]
+    # Bytes stored without gaps from the start, for clients that upload sequentially
+    contiguous = missing[0] if missing else job["size"]
+    return {
+        "upload_id": job["upload_id"],
+        "stage": job.get("stage"),
+        "size": job["size"],
+        "chunk_size": job["chunk_size"],
+        "offset": contiguous,
+        "received": sorted(received),
+        "missing": missing,
+    }
+
+
+def _parse_upload_checksum(header: str) -> str:
+    """tus-style "Upload-Checksum: md5 <base64 digest>"; only md5 is supported."""
+    algorithm, _, digest = header.strip().partition(" ")
+    if algorithm.lower() != "md5" or not digest:
+        raise HTTPException(status_code=400, detail="Upload-Checksum must be 'md5 <base64 digest>'")
+    return digest.strip()
+
+
+@router.post("/upload/chunked/")
+async def create_chunked_upload(
+    request: Request,
+    startup_name: str = Form(...),
+    filename: str = Form(...),
+    size: int = Form(...),
+):
+    """
+    Start a resumable chunked upload. The archive is sent as chunk_size pieces
+    (PATCH /upload/chunked/ with an Upload-Offset header, in any order and in
+    parallel), then reassembled by /upload/chunked/finalize/.
+    """
+    if not filename.endswith((".pdf", ".zip", ".tar", ".tar.gz", ".tgz")):
+        raise HTTPException(status_code=400, detail="File must be .pdf, .zip or .tar(.gz)")
+    if size <= 0 or size > CHUNKED_UPLOAD_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Upload size must be 1 to {CHUNKED_UPLOAD_MAX_SIZE} bytes")
+
+    upload_id = str(uuid.uuid4())
+    client_id = _client_id(request)
+    # Held for DIRECT_UPLOAD_URL_EXPIRY from the latest chunk; finalize takes it for the job
+    await _admit(upload_id, client_id, DIRECT_UPLOAD_URL_EXPIRY)
+    job = await run_in_threadpool(
+        job_store.create, upload_id, startup_name=startup_name, stage="awaiting_upload", client_id=client_id,
+        upload_mode="chunked", filename=filename, size=size, chunk_size=CHUNKED_UPLOAD_CHUNK_SIZE,
+        direct_blob=direct_upload_blob_name(upload_id, filename),
+    )
+    return _chunk_state(job)
+
+
+@router.api_route("/upload/chunked/", methods=["GET", "HEAD"])
+def chunked_upload_status(upload_id: str = Query(...)):
+    """Resume point of a chunked upload: received and missing chunk offsets."""
+    job = _get_job(upload_id)
+    if job.get("upload_mode") != "chunked":
+        raise HTTPException(status_code=400, detail=f"Upload {upload_id} is not a chunked upload")
+    state = _chunk_state(job)
+    return JSONResponse(
+        state,
+        headers={"Upload-Offset": str(state["offset"]), "Upload-Length": str(job["size"]), "Cache-Control": "no-store"},
+    )
+
+
+@router.patch("/upload/chunked/")
+async def upload_chunk_data(
+    request: Request,
+    upload_id: str = Query(...),
+    upload_offset: int = Header(...),
+    upload_checksum: Optional[str] = Header(None),
+):
+    """
+    Store the chunk starting at Upload-Offset (a multiple of chunk_size). The body must
+    be exactly chunk_size bytes, or the remainder for the last chunk. With an
+    Upload-Checksum header the chunk is rejected with 460 if its MD5 differs.
+    Re-sending a chunk simply replaces it; once finalize has claimed the upload, chunks
+    are rejected with 409.
+    """
+    job = await run_in_threadpool(_get_job, upload_id)
+    if job.get("upload_mode") != "chunked":
+        raise HTTPException(status_code=400, detail=f"Upload {upload_id} is not a chunked upload")
+    if job.get("stage") != "awaiting_upload":
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is already {job.get('stage')}")
+    if upload_offset not in _chunk_offsets(job):
+        raise HTTPException(status_code=400, detail=f"Upload-Offset must be a multiple of {job['chunk_size']}")
+
+    expected_length = min(job["chunk_size"], job["size"] - upload_offset)
+    data = bytearray()
+    async for part in request.stream():
+        data.extend(part)
+        if len(data) > expected_length:
+            raise HTTPException(status_code=413, detail=f"Chunk at {upload_offset} must be {expected_length} bytes")
+    if len(data) != expected_length:
+        raise HTTPException(status_code=400, detail=f"Chunk at {upload_offset} must be {expected_length} bytes")
+
+    md5_b64 = base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+    if upload_checksum and _parse_upload_checksum(upload_checksum) != md5_b64:
+        raise HTTPException(status_code=460, detail=f"Checksum mismatch for chunk at {upload_offset}")
+
+    # Register the write while the upload is still open (the same conditional update as the
+    # finalize claim): after the claim no write can start, and finalize waits for this one
+    writing = f"writing:{uuid.uuid4().hex}"
+    registered = await run_in_threadpool(
+        job_store.update_if_stage, upload_id, "awaiting_upload", **{writing: time.time()}
+    )
+    if registered is None:
+        stage = (await run_in_threadpool(job_store.get, upload_id) or job).get("stage")
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is already {stage}")
+    try:
+        await _admit(upload_id, job["client_id"], DIRECT_UPLOAD_URL_EXPIRY)
+        await upload_chunk(upload_id, upload_offset, bytes(data), md5_b64)
+        job = await run_in_threadpool(job_store.update, upload_id, **{f"chunk:{upload_offset}": len(data), writing: None})
+    except BaseException:
+        await run_in_threadpool(job_store.update, upload_id, **{writing: None})
+        raise
+    return Response(status_code=204, headers={"Upload-Offset": str(_chunk_state(job)["offset"])})
+
+
+async def _await_chunk_writes(upload_id: str) -> dict:
+    """
+    The job once the chunk writes registered before the finalize claim have finished.
+    Writes registered more than CHUNKED_UPLOAD_WRITE_TIMEOUT ago are taken as dead.
+    """
+    while True:
+        job = await run_in_threadpool(job_store.get, upload_id)
+        started = time.time() - CHUNKED_UPLOAD_WRITE_TIMEOUT
+        if not any(k.startswith("writing:") and v and v > started for k, v in job.items()):
+            return job
+        await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL / 4)
+
+
+@router.post("/upload/chunked/finalize/")
+async def finalize_chunked_upload(upload_id: str = Form(...)):
+    """
+    Reassemble the chunks into one archive in the bucket and ingest it like /upload/finalize/.
+    Answers 409 with the missing offsets while chunks are outstanding.
+    """
+    await run_in_threadpool(_claim_for_finalize, upload_id, "chunked")
+    job = await _await_chunk_writes(upload_id)
+    state = _chunk_state(job)
+    if state["missing"]:
+        await run_in_threadpool(job_store.update, upload_id, stage="awaiting_upload")
+        raise HTTPException(status_code=409, detail={"message": "Chunks missing", "missing": state["missing"]})
+    await _admit_claimed(upload_id, job)
+
+    try:
+        await compose_chunks(upload_id, _chunk_offsets(job), job["direct_blob"])
+    except Exception as e:
+        await run_in_threadpool(_fail_job, upload_id, str(e))
+        raise
+    return await _ingest_bucket_object(upload_id, job, job["direct_blob"])
+
+
+async def _sweep_abandoned_uploads():
+    """
+    Delete the chunk and direct-upload objects of uploads idle for ABANDONED_UPLOAD_SECONDS,
+    or whose job record has expired. Uploads still awaiting data are failed first, with the
+    same conditional update as the finalize claim, so a finalize in progress keeps its objects.
+    """
+    cutoff = time.time() - ABANDONED_UPLOAD_SECONDS
+    objects = await list_upload_objects()
+    stale = {
+        upload_id: [name for name, _ in blobs]
+        for upload_id, blobs in objects.items() if all(updated < cutoff for _, updated in blobs)
+    }
+    jobs = await run_in_threadpool(job_store.get_many, list(stale))
+    for upload_id, blob_names in stale.items():
+        job = jobs.get(upload_id)
+        if job and job.get("updated_at", 0) >= cutoff:
+            continue
+        if job and job.get("stage") == "awaiting_upload":
+            abandoned = await run_in_threadpool(
+                job_store.update_if_stage, upload_id, "awaiting_upload", stage="failed", error="Upload abandoned",
+            )
+            if abandoned is None:
+                continue
+        await asyncio.gather(*(delete_blob(name) for name in blob_names))
+        print(f"🗑️ Deleted {len(blob_names)} objects of abandoned upload {upload_id}")
+
+
+async def run_abandoned_upload_sweeper():
+    while True:
+        await asyncio.sleep(ABANDONED_UPLOAD_SWEEP_INTERVAL_SECONDS)
+        try:
+            await _sweep_abandoned_uploads()
+        except Exception as e:
+            print(f"⚠️ Abandoned upload sweep failed: {e}")
+
+
+def _manifest_fields(manifest: dict) -> dict:
+    """Translate a worker completion manifest into job store fields."""
+    fields = {}
+    analysis = manifest.get("analysis") or {}
+    if analysis.get("status") == "completed" and analysis.get("pdf_url"):
+        fields["pdf_url"] = analysis["pdf_url"]
+    elif analysis:
+        fields["pdf_error"] = analysis.get("error") or "unknown error"
+    infographic = manifest.get("infographic") or {}
+    if infographic.get("status") == "completed" and infographic.get("image_urls"):
+        fields["image_urls"] = infographic["image_urls"]
+    elif infographic:
+        fields["images_error"] = infographic.get("error") or "unknown error"
+    return fields
+
+
+def _manifest_finished_at(manifest: dict):
+    """When the last worker wrote its entry (epoch seconds), or None."""
+    times = []
+    for key in ("analysis", "infographic"):
+        updated_at = (manifest.get(key) or {}).get("updated_at")
+        if updated_at:
+            # Workers write naive UTC timestamps (datetime.utcnow().isoformat())
+            times.append(datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc).timestamp())
+    return max(times) if times else None
+
+
+def _apply_manifest(job: dict, manifest: dict, generation: str = None) -> dict:
+    fields = _manifest_fields(manifest) if manifest else {}
+    if fields and generation:
+        # Lets read_manifests skip this manifest until a worker rewrites it
+        fields["manifest_generation"] = generation
+    if fields and any(job.get(k) != v for k, v in fields.items()):
+        job = job_store.update(job["upload_id"], **fields)
+        report_cache.store_completed_job(job)
+        admission.release_if_finished(job, _manifest_finished_at(manifest))
+    return job
+
+
+async def _resolve_job(upload_id: str) -> dict:
+    """
+    Job state for the status endpoints. Unresolved jobs cost at most one manifest
+    read, and none at all when the result subscriber keeps the job store current.
+    """
+    job = await run_in_threadpool(_get_job, upload_id)
+    if job_finished(job) or RESULT_SUBSCRIPTIONS:
+        return job
+    return await run_in_threadpool(_apply_manifest, job, await read_manifest(upload_id))
+
+
+async def _resolve_jobs(upload_ids: list) -> dict:
+    """
+    _resolve_job for many uploads: one job store read answers finished jobs; for unfinished
+    ones, batched manifest listings and reads of only the manifests that changed.
+    """
+    jobs = await run_in_threadpool(job_store.get_many, upload_ids)
+    if RESULT_SUBSCRIPTIONS:
+        return jobs
+    pending = {upload_id: job.get("manifest_generation") for upload_id, job in jobs.items() if not job_finished(job)}
+    for upload_id, (manifest, generation) in (await read_manifests(list(pending), pending)).items():
+        jobs[upload_id] = await run_in_threadpool(_apply_manifest, jobs[upload_id], manifest, generation)
+    return jobs
+
+
+async def _sweep_inflight_jobs():
+    """Resolve every handed-off job that holds an admission slot from its completion manifest."""
+    upload_ids = await run_in_threadpool(admission.inflight_uploads)
+    jobs = await run_in_threadpool(job_store.get_many, upload_ids)
+    handed_off = {
+        upload_id: job.get("manifest_generation")
+        for upload_id, job in jobs.items() if job.get("stage") in ("uploaded", "imported")
+    }
+    for upload_id, (manifest, generation) in (await read_manifests(list(handed_off), handed_off)).items():
+        await run_in_threadpool(_apply_manifest, jobs[upload_id], manifest, generation)
+
+
+async def run_admission_sweeper():
+    """
+    Without RESULT_SUBSCRIPTIONS nothing tells the gateway a job finished until a client asks
+    about it; this loop frees the slots of finished jobs every ADMISSION_SWEEP_INTERVAL_SECONDS
+    whether or not anyone is polling or streaming.
+    """
+    while True:
+        await asyncio.sleep(ADMISSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            await _sweep_inflight_jobs()
+        except Exception as e:
+            print(f"⚠️ Admission sweep failed: {e}")
+
+
+def _pdf_status(job: dict) -> dict:
+    if job.get("pdf_url"):
+        return {"status": "completed", "download_url": job["pdf_url"]}
+    if job.get("pdf_error"):
+        return {"status": "failed", "error": job["pdf_error"]}
+    if job.get("stage") == "failed":
+        # Failed before reaching the workers (upload, extraction or hand-off)
+        return {"status": "failed", "error": job.get("error") or "unknown error"}
     return {"status": "processing"}
 
-@router.get("/status/images/")
-def check_status(upload_id: str = Query(...)):
-    """
-    Check if infographics images (01, 02, 03) are ready in GCS.
-    """
-    if upload_id  in upload_ids:
-       return {
-            "status": "completed",
-            "download_url": IMAGE_URL
-       }
-
-    startup_name = upload_id_to_startup[upload_id]
-    image_files = [
-        f"analysis_reports/{startup_name}_{upload_id}_image_01.pdf",
-        f"analysis_reports/{startup_name}_{upload_id}_image_02.pdf",
-        f"analysis_reports/{startup_name}_{upload_id}_image_03.pdf"
-    ]
-
-    # Check if all images exist
-    all_exist = all(bucket.blob(blob).exists() for blob in image_files)
-
-    if all_exist:
-        download_urls = [
-            f"https://storage.googleapis.com/{BUCKET_NAME}/{blob}" for blob in image_files
-        ]
-        return {
-            "status": "completed",
-            "download_url": download_urls
-        }
 
+def _images_status(job: dict) -> dict:
+    if job.get("image_urls"):
+        return {"status": "completed", "download_url": job["image_urls"]}
+    if job.get("images_error"):
+        return {"status": "failed", "error": job["images_error"]}
+    if job.get("stage") == "failed":
+        # Failed before reaching the workers (upload, extraction or hand-off)
+        return {"status": "failed", "error": job.get("error") or "unknown error"}
     return {"status": "processing"}
+
+
+def _combined_status(job: dict) -> str:
+    pdf, images = _pdf_status(job)["status"], _images_status(job)["status"]
+    if job.get("stage") == "failed" or ("failed" in (pdf, images) and "processing" not in (pdf, images)):
+        return "failed"
+    if pdf == images == "completed":
+        return "completed"
+    return "processing"
+
+
+@router.get("/status/")
+async def check_combined_status(upload_id: str = Query(...)):
+    """
+    Report PDF and infographic images for an upload, resolved together.
+    """
+    job = await _resolve_job(upload_id)
+    return {"upload_id": upload_id, "status": _combined_status(job), "pdf": _pdf_status(job), "images": _images_status(job)}
+
+
+@router.post("/status/bulk/")
+async def check_bulk_status(upload_ids: List[str] = Body(..., embed=True)):
+    """
+    Status of many uploads in one request, e.g. for a portfolio dashboard:
+    {"jobs": {upload_id: {"status", "pdf_url", "image_urls", "error"}}, "unknown": [...]}.
+    """
+    upload_ids = list(dict.fromkeys(upload_ids))
+    if len(upload_ids) > BULK_STATUS_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_STATUS_MAX_IDS} upload_ids per request")
+
+    jobs = await _resolve_jobs(upload_ids)
+    result = {}
+    for upload_id in upload_ids:
+        job = jobs.get(upload_id)
+        if job is None:
+            continue
+        entry = {"status": _combined_status(job), "pdf_url": job.get("pdf_url"), "image_urls": job.get("image_urls")}
+        error = job.get("error") or job.get("pdf_error") or job.get("images_error")
+        if error:
+            entry["error"] = error
+        result[upload_id] = entry
+    return {"jobs": result, "unknown": [upload_id for upload_id in upload_ids if upload_id not in jobs]}
+
+
+@router.get("/status/pdf/")
+async def check_pdf_status(upload_id: str = Query(...)):
+    """
+    Check if analysis PDF is ready.
+    """
+    return _pdf_status(await _resolve_job(upload_id))
+
+
+@router.get("/status/images/")
+async def check_images_status(upload_id: str = Query(...)):
+    """
+    Check if infographic images are ready.
+    """
+    return _images_status(await _resolve_job(upload_id))
+
+def _job_events(job: dict):
+    """Every (event_id, event, data) the job has reached so far, in pipeline order."""
+    stage = job.get("stage")
+    if stage in ("uploaded", "imported", "completed") or job.get("files") is not None:
+        yield "uploaded", "uploaded", {"files": job.get("files", [])}
+    if job.get("rag_corpus"):
+        yield "imported", "imported", {"rag_corpus": job["rag_corpus"]}
+    for key in sorted(k for k in job if k.startswith("section:")):
+        _, service_name, section = key.split(":", 2)
+        yield key, "section_done", {"service": service_name, "section": section}
+    if job.get("pdf_url"):
+        yield "pdf", "pdf_ready", {"download_url": job["pdf_url"]}
+    elif job.get("pdf_error"):
+        yield "pdf", "pdf_failed", {"error": job["pdf_error"]}
+    if job.get("image_urls"):
+        yield "images", "images_ready", {"download_url": job["image_urls"]}
+    elif job.get("images_error"):
+        yield "images", "images_failed", {"error": job["images_error"]}
+    if stage == "failed":
+        yield "failed", "failed", {"error": job.get("error")}
+
+
+async def _job_event_stream(upload_id: str):
+    sent = set()
+    last_write = time.monotonic()
+    next_manifest_read = 0.0
+    while True:
+        job = await run_in_threadpool(job_store.get, upload_id)
+        if job is None:
+            yield "event: failed\ndata: {\"error\": \"job expired\"}\n\n"
+            return
+        # Without result subscriptions only the completion manifest knows the artifacts
+        if not RESULT_SUBSCRIPTIONS and not job_finished(job) and time.monotonic() >= next_manifest_read:
+            next_manifest_read = time.monotonic() + JOB_EVENTS_MANIFEST_INTERVAL
+            job = await run_in_threadpool(_apply_manifest, job, await read_manifest(upload_id))
+
+        for event_id, event, data in _job_events(job):
+            if event_id not in sent:
+                sent.add(event_id)
+                last_write = time.monotonic()
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+        if job_finished(job):
+            return
+        if time.monotonic() - last_write >= JOB_EVENTS_HEARTBEAT_INTERVAL:
+            # SSE comment line: keeps proxies and load balancers from idling the connection out
+            last_write = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+
+@router.get("/status/stream/")
+def stream_status(upload_id: str = Query(...)):
+    """
+    Server-sent events for one upload: uploaded, imported, section_done (per section),
+    pdf_ready / pdf_failed, images_ready / images_failed, and failed if the job fails
+    before reaching the workers. The stream closes once both the PDF and the images
+    are resolved. Without RESULT_SUBSCRIPTIONS, artifacts are picked up from the
+    completion manifest every JOB_EVENTS_MANIFEST_INTERVAL seconds.
+    """
+    _get_job(upload_id)
+    return StreamingResponse(
+        _job_event_stream(upload_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,250 @@
+from abc import ABC, abstractmethod
+import math
+import sqlite3
+import threading
+import time
+
+from config import (
+    JOB_STORE_BACKEND, JOB_STORE_PATH, JOB_STORE_REDIS_URL,
+    ADMISSION_MAX_INFLIGHT, ADMISSION_MAX_INFLIGHT_PER_CLIENT,
+    ADMISSION_JOB_TIMEOUT_SECONDS, ADMISSION_DEFAULT_JOB_SECONDS,
+)
+from services.job_store import job_finished
+
+# Weight of the newest job in the moving average of job duration
+_DURATION_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController(ABC):
+    """
+    Caps jobs in flight (admitted but without a final PDF and images) globally and
+    per client, across all gateway workers. A slot is released when the job finishes
+    and expires hold_seconds after it was last taken or renewed, so slots of jobs that
+    never report back (or of direct uploads that never arrive) are reclaimed on their own.
+    A value of 0 disables the corresponding limit.
+    """
+
+    def __init__(self, max_inflight: int, max_per_client: int, job_timeout: int, default_job_seconds: float):
+        self.max_inflight = max_inflight
+        self.max_per_client = max_per_client
+        self.job_timeout = job_timeout
+        self.default_job_seconds = default_job_seconds
+
+    def admit(self, upload_id: str, client_id: str, hold_seconds: int = None):
+        """
+        Take a slot for upload_id for hold_seconds (default ADMISSION_JOB_TIMEOUT_SECONDS), or
+        raise AdmissionRejected with a Retry-After estimate. A slot upload_id already holds is
+        renewed for hold_seconds from now, without counting against the limits again.
+        """
+        now = time.time()
+        expires_at = now + (hold_seconds or self.job_timeout)
+        admitted, inflight, client_inflight = self._try_admit(upload_id, client_id, now, expires_at)
+        if admitted:
+            return
+
+        if self.max_per_client and client_inflight >= self.max_per_client:
+            reason = f"Too many uploads in progress for this client ({client_inflight}/{self.max_per_client})"
+            depth, limit = client_inflight, self.max_per_client
+        else:
+            reason = f"Too many uploads in progress ({inflight}/{self.max_inflight})"
+            depth, limit = inflight, self.max_inflight
+        raise AdmissionRejected(reason, self._retry_after(depth, limit))
+
+    def release_if_finished(self, job: dict, finished_at: float = None):
+        if job and job.get("client_id") and job_finished(job):
+            self.release(job, finished_at)
+
+    def release(self, job: dict, finished_at: float = None):
+        """
+        Drop the job's slot. The moving average behind Retry-After learns from jobs that ran
+        through the workers, timed from ingestion to finished_at (when the workers finished,
+        if known) rather than to whenever the gateway happened to notice.
+        """
+        held = self._release(job["upload_id"], job["client_id"])
+        started_at = job.get("received_at")
+        if held and started_at and job.get("stage") != "failed" and not job.get("cached_from"):
+            self._observe_duration(max(0.0, (finished_at or time.time()) - started_at))
+
+    def _retry_after(self, depth: int, limit: int) -> int:
+        # Slots free up at roughly limit / job_duration per second; wait for our turn in the queue
+        job_seconds = self._average_duration() or self.default_job_seconds
+        wait = job_seconds * (depth - limit + 1) / max(limit, 1)
+        return max(1, math.ceil(min(wait, job_seconds)))
+
+    @abstractmethod
+    def _try_admit(self, upload_id: str, client_id: str, now: float, expires_at: float):
+        """Returns (admitted, inflight, client_inflight) after pruning slots expired by now."""
+
+    @abstractmethod
+    def _release(self, upload_id: str, client_id: str) -> bool:
+        """Drop the slot; returns whether it was held."""
+
+    @abstractmethod
+    def inflight_uploads(self) -> list:
+        """upload_ids currently holding a slot."""
+
+    @abstractmethod
+    def _average_duration(self):
+        ...
+
+    @abstractmethod
+    def _observe_duration(self, seconds: float):
+        ...
+
+
+class SQLiteAdmissionController(AdmissionController):
+    def __init__(self, path: str, *args):
+        super().__init__(*args)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_slots ("
+            "upload_id TEXT PRIMARY KEY, client_id TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS admission_slots_expires_at ON admission_slots (expires_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS admission_stats (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def _try_admit(self, upload_id, client_id, now, expires_at):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM admission_slots WHERE expires_at <= ?", (now,))
+                inflight = self._conn.execute("SELECT COUNT(*) FROM admission_slots").fetchone()[0]
+                client_inflight = self._conn.execute(
+                    "SELECT COUNT(*) FROM admission_slots WHERE client_id = ?", (client_id,)
+                ).fetchone()[0]
+                held = self._conn.execute(
+                    "SELECT 1 FROM admission_slots WHERE upload_id = ?", (upload_id,)
+                ).fetchone() is not None
+                admitted = held or not (
+                    (self.max_inflight and inflight >= self.max_inflight)
+                    or (self.max_per_client and client_inflight >= self.max_per_client)
+                )
+                if admitted:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO admission_slots (upload_id, client_id, expires_at) VALUES (?, ?, ?)",
+                        (upload_id, client_id, expires_at),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return admitted, inflight, client_inflight
+
+    def _release(self, upload_id, client_id):
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM admission_slots WHERE upload_id = ? AND expires_at > ?", (upload_id, time.time())
+            ).rowcount
+        return deleted > 0
+
+    def inflight_uploads(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT upload_id FROM admission_slots WHERE expires_at > ?", (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _average_duration(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM admission_stats WHERE name = 'job_seconds'").fetchone()
+        return row[0] if row else None
+
+    def _observe_duration(self, seconds):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO admission_stats (name, value) VALUES ('job_seconds', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + ? * (excluded.value - value)",
+                (seconds, _DURATION_EWMA_ALPHA),
+            )
+
+
+class RedisAdmissionController(AdmissionController):
+    # Sorted sets of upload_ids scored by slot expiry: all slots, and one set per client
+    INFLIGHT_KEY = "gateway:admission-slots"
+    CLIENT_KEY_PREFIX = "gateway:admission-slots:"
+    DURATION_KEY = "gateway:job-seconds"
+
+    # Prune, count and admit (or renew) atomically so concurrent replicas cannot overshoot the limits
+    _ADMIT_SCRIPT = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+    local inflight = redis.call('ZCARD', KEYS[1])
+    local client_inflight = redis.call('ZCARD', KEYS[2])
+    local max_inflight = tonumber(ARGV[3])
+    local max_client = tonumber(ARGV[4])
+    local held = redis.call('ZSCORE', KEYS[1], ARGV[5])
+    if not held and ((max_inflight > 0 and inflight >= max_inflight) or (max_client > 0 and client_inflight >= max_client)) then
+        return {0, inflight, client_inflight}
+    end
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[5])
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[5])
+    redis.call('EXPIRE', KEYS[2], ARGV[6])
+    return {1, inflight, client_inflight}
+    """
+
+    # Only a slot that has not expired counts as held
+    _RELEASE_SCRIPT = """
+    local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    if expires_at and tonumber(expires_at) > tonumber(ARGV[2]) then
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, *args):
+        super().__init__(*args)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("redis is required for JOB_STORE_BACKEND=redis. Install with: pip install redis") from e
+        self._client = redis.Redis.from_url(url)
+        self._admit_script = self._client.register_script(self._ADMIT_SCRIPT)
+        self._release_script = self._client.register_script(self._RELEASE_SCRIPT)
+
+    def _try_admit(self, upload_id, client_id, now, expires_at):
+        admitted, inflight, client_inflight = self._admit_script(
+            keys=[self.INFLIGHT_KEY, self.CLIENT_KEY_PREFIX + client_id],
+            args=[now, expires_at, self.max_inflight, self.max_per_client, upload_id, self.job_timeout],
+        )
+        return bool(admitted), inflight, client_inflight
+
+    def _release(self, upload_id, client_id):
+        return bool(self._release_script(
+            keys=[self.INFLIGHT_KEY, self.CLIENT_KEY_PREFIX + client_id], args=[upload_id, time.time()],
+        ))
+
+    def inflight_uploads(self):
+        return [m.decode("utf-8") for m in self._client.zrangebyscore(self.INFLIGHT_KEY, time.time(), "+inf")]
+
+    def _average_duration(self):
+        value = self._client.get(self.DURATION_KEY)
+        return float(value) if value is not None else None
+
+    def _observe_duration(self, seconds):
+        current = self._average_duration()
+        value = seconds if current is None else current + _DURATION_EWMA_ALPHA * (seconds - current)
+        self._client.set(self.DURATION_KEY, value)
+
+
+def create_admission_controller() -> AdmissionController:
+    args = (
+        ADMISSION_MAX_INFLIGHT, ADMISSION_MAX_INFLIGHT_PER_CLIENT,
+        ADMISSION_JOB_TIMEOUT_SECONDS, ADMISSION_DEFAULT_JOB_SECONDS,
+    )
+    if JOB_STORE_BACKEND == "redis":
+        return RedisAdmissionController(JOB_STORE_REDIS_URL, *args)
+    return SQLiteAdmissionController(JOB_STORE_PATH, *args)
+
+
+admission = create_admission_controller()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import Optional
+
+import aiohttp
+from gcloud.aio.storage import Storage
+from google.api_core.exceptions import NotFound
+
+from config import BUCKET_NAME, GCS_ASYNC_CONCURRENCY, GCS_ASYNC_KEEPALIVE
+
+# Created on first use inside the running event loop, closed by the app lifespan
+_session: Optional[aiohttp.ClientSession] = None
+_storage: Optional[Storage] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _client() -> Storage:
+    """
+    Event-loop native GCS client over one keep-alive connection pool shared by every
+    request. Honours STORAGE_EMULATOR_HOST like the synchronous client does.
+    """
+    global _session, _storage, _semaphore
+    if _storage is None:
+        connector = aiohttp.TCPConnector(limit=GCS_ASYNC_CONCURRENCY, keepalive_timeout=GCS_ASYNC_KEEPALIVE)
+        _session = aiohttp.ClientSession(connector=connector)
+        _storage = Storage(session=_session)
+        _semaphore = asyncio.Semaphore(GCS_ASYNC_CONCURRENCY)
+    return _storage
+
+
+async def close_async_storage():
+    global _session, _storage, _semaphore
+    if _session is not None:
+        await _session.close()
+    _session = _storage = _semaphore = None
+
+
+def _not_found(e: aiohttp.ClientResponseError, blob_name: str):
+    # Callers handle missing objects the same way for both clients
+    if e.status == 404:
+        return NotFound(f"gs://{BUCKET_NAME}/{blob_name}")
+    return e
+
+
+async def download(blob_name: str) -> bytes:
+    storage = _client()
+    async with _semaphore:
+        try:
+            return await storage.download(BUCKET_NAME, blob_name)
+        except aiohttp.ClientResponseError as e:
+            raise _not_found(e, blob_name) from e
+
+
+async def download_metadata(blob_name: str) -> dict:
+    """The object's resource (size, md5Hash, crc32c, generation, ...)."""
+    storage = _client()
+    async with _semaphore:
+        try:
+            return await storage.download_metadata(BUCKET_NAME, blob_name)
+        except aiohttp.ClientResponseError as e:
+            raise _not_found(e, blob_name) from e
+
+
+async def download_json(blob_name: str) -> Optional[dict]:
+    """Parsed JSON object, or None if it does not exist."""
+    try:
+        return json.loads(await download(blob_name))
+    except NotFound:
+        return None
+
+
+async def download_stream(blob_name: str, chunk_size: int):
+    """Yield the object's bytes in chunks of at most chunk_size."""
+    storage = _client()
+    async with _semaphore:
+        try:
+            stream = await storage.download_stream(BUCKET_NAME, blob_name)
+        except aiohttp.ClientResponseError as e:
+            raise _not_found(e, blob_name) from e
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def list_objects(prefix: str, match_glob: str = None, fields: str = "items(name,generation),nextPageToken") -> list:
+    """Resources of the objects under prefix (optionally filtered by a matchGlob), all pages."""
+    storage = _client()
+    params = {"prefix": prefix, "fields": fields}
+    if match_glob:
+        params["matchGlob"] = match_glob
+    items = []
+    while True:
+        async with _semaphore:
+            page = await storage.list_objects(BUCKET_NAME, params=params)
+        items.extend(page.get("items", []))
+        if not page.get("nextPageToken"):
+            return items
+        params["pageToken"] = page["nextPageToken"]
+
+
+async def upload(blob_name: str, data: bytes, content_type: str = "application/octet-stream", md5_b64: str = None):
+    """Upload bytes; with md5_b64, GCS rejects the object if the content does not match."""
+    storage = _client()
+    metadata = {"md5Hash": md5_b64} if md5_b64 else None
+    async with _semaphore:
+        await storage.upload(BUCKET_NAME, blob_name, data, content_type=content_type, metadata=metadata)
+
+
+async def compose(blob_name: str, source_names: list):
+    storage = _client()
+    async with _semaphore:
+        await storage.compose(BUCKET_NAME, blob_name, source_names)
+
+
+async def delete(blob_name: str):
+    """Delete the object; missing objects are ignored."""
+    storage = _client()
+    async with _semaphore:
+        try:
+            await storage.delete(BUCKET_NAME, blob_name)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 404:
+                raise
@@ -1,53 +1,596 @@
 from google.cloud import storage
-from config import BUCKET_NAME
+from google.cloud.storage.retry import DEFAULT_RETRY
+from requests.adapters import HTTPAdapter
+import google.auth.transport.requests
+from config import (
+    DIRECT_UPLOAD_MODE, DIRECT_UPLOAD_PREFIX, DIRECT_UPLOAD_URL_EXPIRY, DIRECT_UPLOAD_ORIGIN,
+    CHUNKED_UPLOAD_PREFIX,
+    BUCKET_NAME, UPLOAD_CHUNK_SIZE, UPLOAD_SPOOL_DIR,
+    GCS_UPLOAD_CONCURRENCY, GCS_UPLOAD_RETRY_DEADLINE,
+    ARCHIVE_EXTRACT_MODE, GCS_STREAM_CHUNK_SIZE,
+    ARCHIVE_MAX_TOTAL_SIZE, ARCHIVE_MAX_MEMBERS, ARCHIVE_MAX_COMPRESSION_RATIO,
+    MANIFEST_LIST_BATCH_SIZE,
+)
 import os
+import time
+import asyncio
+import base64
+import contextvars
+import datetime
+import hashlib
 import tempfile
 import zipfile
 import tarfile
-from fastapi import UploadFile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParser, MultipartParseError, parse_options_header
+from services import async_storage
+from services import metrics
 
 storage_client = storage.Client()
 bucket = storage_client.bucket(BUCKET_NAME)   # ✅ Define bucket here
 
-async def extract_and_upload_file_to_gcs(file: UploadFile, startup_name, upload_id):
+# One keep-alive pool sized to the upload parallelism, shared by every request
+_pool_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GCS_UPLOAD_CONCURRENCY)
+storage_client._http.mount("https://", _pool_adapter)
+storage_client._http.mount("http://", _pool_adapter)
+
+# Bounds concurrent member uploads across all in-flight requests
+_upload_executor = ThreadPoolExecutor(max_workers=GCS_UPLOAD_CONCURRENCY, thread_name_prefix="gcs-upload")
+
+# Uploads go to a fresh per-upload_id name, so retrying them is always safe
+_upload_retry = DEFAULT_RETRY.with_deadline(GCS_UPLOAD_RETRY_DEADLINE)
+
+
+class ArchiveLimitError(ValueError):
+    """Raised when an archive exceeds the configured size, member or ratio limits."""
+
+
+class MalformedUploadError(ValueError):
+    """Raised when an /upload/ body is not a well-formed multipart form."""
+
+
+# Plain form fields (startup_name) are tiny; anything larger is refused rather than buffered
+_MAX_FORM_FIELD_SIZE = 64 * 1024
+
+
+def _hash_and_write(hasher, spool, chunk: bytes):
+    # hashlib releases the GIL for large buffers, so this runs fine in a worker thread
+    hasher.update(chunk)
+    spool.write(chunk)
+
+
+class _MultipartSpool:
     """
-    Save uploaded zip/tar/pdf to a temp folder and upload to GCS immediately.
-    Returns [(gcs_path, filename), ...]
+    python-multipart callbacks for one upload form: plain fields are collected in memory,
+    the file part is hashed and written to the spool directory as its bytes arrive.
     """
-    uploaded_paths = []
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        file_path = os.path.join(tmpdir, file.filename)
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+    def __init__(self, content_type: str, spool_dir: str, file_field: str):
+        mime_type, params = parse_options_header(content_type)
+        if mime_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MalformedUploadError("Expected a multipart/form-data body")
+
+        self.spool_dir = spool_dir
+        self.file_field = file_field
+        self.fields = {}
+        self.filename = None
+        self.spool_path = None
+        self.size = 0
+        self.hash_seconds = 0.0
+        self._hasher = hashlib.md5()
+        self._spool = None
+        self._headers = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._field_name = None
+        self._field_value = bytearray()
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    @property
+    def md5(self) -> str:
+        return self._hasher.hexdigest()
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self):
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = os.path.basename(disposition.get(b"filename", b"").decode("utf-8", "replace"))
+        if name == self.file_field and filename:
+            if self._spool is not None:
+                raise MalformedUploadError(f"Only one '{self.file_field}' per upload")
+            self.filename = filename
+            # The client's filename only decides the archive type; it never becomes a path
+            self.spool_path = os.path.join(self.spool_dir, "upload")
+            self._spool = open(self.spool_path, "wb")
+            self._field_name = None
+        else:
+            self._field_name = name
+            self._field_value = bytearray()
+
+    def _on_part_data(self, data, start, end):
+        if self._field_name is not None:
+            self._field_value.extend(data[start:end])
+            if len(self._field_value) > _MAX_FORM_FIELD_SIZE:
+                raise MalformedUploadError(f"Form field '{self._field_name}' is too large")
+            return
+        if self._spool is None:
+            return
+        started = time.perf_counter()
+        _hash_and_write(self._hasher, self._spool, data[start:end])
+        self.hash_seconds += time.perf_counter() - started
+        self.size += end - start
+
+    def _on_part_end(self):
+        if self._field_name is not None:
+            self.fields[self._field_name] = self._field_value.decode("utf-8", "replace")
+        elif self._spool is not None:
+            self._spool.flush()
+        self._field_name = None
+
+    def write(self, data: bytes):
+        try:
+            self._parser.write(data)
+        except MultipartParseError as e:
+            raise MalformedUploadError(f"Malformed multipart body: {e}") from e
+
+    def finalize(self):
+        try:
+            self._parser.finalize()
+        except MultipartParseError as e:
+            raise MalformedUploadError(f"Malformed multipart body: {e}") from e
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+
+
+@asynccontextmanager
+async def spool_upload(request: Request, file_field: str = "file"):
+    """
+    Parse a multipart upload straight off the request stream: form fields are collected
+    and the file part is hashed and spooled to local disk in the same pass, so its bytes
+    are read and written once (the framework never keeps a copy of its own).
+    Parsing runs in the threadpool, UPLOAD_CHUNK_SIZE bytes at a time.
+    Yields (fields, filename, spool_path, md5_hex); filename and spool_path are None if
+    the form had no file. The spool is removed on exit.
+    """
+    with tempfile.TemporaryDirectory(dir=UPLOAD_SPOOL_DIR) as spool_dir:
+        spool = _MultipartSpool(request.headers.get("content-type", ""), spool_dir, file_field)
+        try:
+            buffer = bytearray()
+            async for part in request.stream():
+                buffer.extend(part)
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await run_in_threadpool(spool.write, bytes(buffer))
+                    buffer.clear()
+            await run_in_threadpool(spool.write, bytes(buffer))
+            spool.finalize()
+        finally:
+            spool.close()
+        _observe_spool(spool.size, spool.hash_seconds)
+        yield spool.fields, spool.filename, spool.spool_path, spool.md5
+
+
+def _observe_spool(size: int, hash_seconds: float):
+    endpoint = metrics.current_endpoint()
+    metrics.UPLOAD_BYTES.labels(endpoint).observe(size)
+    metrics.HASH_SECONDS.labels(endpoint).observe(hash_seconds)
+
+
+def _hash_stream(fileobj) -> str:
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(UPLOAD_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class _HashingReader:
+    """
+    Read-through wrapper that hashes a file object's bytes as an upload consumes them.
+    Bytes re-read after the upload seeks back to retry a chunk are not hashed twice.
+    """
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self._hasher = hashlib.sha256()
+        self._hashed_to = 0
+
+    def read(self, size: int = -1) -> bytes:
+        position = self._file.tell()
+        data = self._file.read(size)
+        end = position + len(data)
+        if end > self._hashed_to:
+            self._hasher.update(data[self._hashed_to - position:])
+            self._hashed_to = end
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def hexdigest(self) -> str:
+        # Hash whatever the upload did not read itself
+        while self.read(UPLOAD_CHUNK_SIZE):
+            pass
+        return self._hasher.hexdigest()
+
+
+def _upload_stream(fileobj, size: int, blob_name: str):
+    # Small files go up in a single request; larger ones as a chunked resumable stream
+    chunk_size = GCS_STREAM_CHUNK_SIZE if size > GCS_STREAM_CHUNK_SIZE else None
+    blob = bucket.blob(blob_name, chunk_size=chunk_size)
+    with metrics.timed(metrics.GCS_UPLOAD_SECONDS):
+        blob.upload_from_file(fileobj, size=size, retry=_upload_retry)
+    return blob
+
+
+def _upload_document(open_member, name: str, size: int, blob_name: str, known_documents: dict, hash_first: bool = True) -> dict:
+    """
+    Hash one document and upload it unless the startup already has identical content in GCS.
+    open_member() must return a readable binary file object and may be called twice.
+    With hash_first, the document is hashed and then opened again to upload it only if it is
+    new (local files and zip members). Members of a compressed tar can only be re-read by
+    decompressing again from the start, so they are hashed while they upload instead and the
+    object is deleted if its content turns out to be known. Nothing is copied to local disk.
+    Returns {"name", "sha256", "gcs_path", "reused"}.
+    """
+    if hash_first:
+        with open_member() as member_file:
+            digest = _hash_stream(member_file)
+        known = known_documents.get(digest)
+        if known:
+            return {"name": name, "sha256": digest, "gcs_path": known["gcs_path"], "reused": True}
+        with open_member() as member_file:
+            _upload_stream(member_file, size, blob_name)
+    else:
+        with open_member() as member_file:
+            reader = _HashingReader(member_file)
+            blob = _upload_stream(reader, size, blob_name)
+            digest = reader.hexdigest()
+        known = known_documents.get(digest)
+        if known:
+            blob.delete(retry=_upload_retry)
+            return {"name": name, "sha256": digest, "gcs_path": known["gcs_path"], "reused": True}
+    return {"name": name, "sha256": digest, "gcs_path": f"gs://{BUCKET_NAME}/{blob_name}", "reused": False}
+
+
+def upload_files_to_gcs(files_to_process, startup_name, upload_id, known_documents: dict):
+    """
+    Upload [(local_path, member_name), ...] in parallel on the shared upload pool.
+    Each file is retried on transient errors; results are returned in input order.
+    """
+    # Each task runs in a copy of the request's context so its metrics keep the endpoint label
+    futures = [
+        _upload_executor.submit(
+            contextvars.copy_context().run, _upload_document,
+            lambda path=path: open(path, "rb"), fname, os.path.getsize(path),
+            f"{startup_name}/{upload_id}_{fname}", known_documents,
+        )
+        for path, fname in files_to_process
+    ]
+    return [future.result() for future in futures]
+
+
+def _check_archive_limits(filename: str, members, archive_size: int):
+    """
+    members: [(name, uncompressed_size, compressed_size or None), ...]
+    Declared sizes are trustworthy enough here: zipfile and tarfile never
+    read past a member's declared size, so they also bound what gets streamed.
+    """
+    if len(members) > ARCHIVE_MAX_MEMBERS:
+        raise ArchiveLimitError(f"{filename} has {len(members)} files, limit is {ARCHIVE_MAX_MEMBERS}")
+
+    total_size = sum(size for _, size, _ in members)
+    if total_size > ARCHIVE_MAX_TOTAL_SIZE:
+        raise ArchiveLimitError(f"{filename} expands to {total_size} bytes, limit is {ARCHIVE_MAX_TOTAL_SIZE}")
+
+    for name, size, compressed in members:
+        if compressed is not None and size > ARCHIVE_MAX_COMPRESSION_RATIO * max(compressed, 1):
+            raise ArchiveLimitError(f"{name} in {filename} exceeds the compression ratio limit")
+
+    # tar members carry no compressed size, so check the archive as a whole
+    if total_size > ARCHIVE_MAX_COMPRESSION_RATIO * max(archive_size, 1):
+        raise ArchiveLimitError(f"{filename} exceeds the compression ratio limit")
+
+
+@contextmanager
+def _open_zip_member(archive_path: str, member: str):
+    # Each worker opens its own handle so members can be read in parallel
+    with zipfile.ZipFile(archive_path, "r") as zip_ref:
+        with zip_ref.open(member) as member_file:
+            yield member_file
+
+
+def _stream_members_to_gcs(archive_path: str, filename: str, startup_name, upload_id, known_documents: dict):
+    """Upload archive members straight from the spooled archive, without extracting to disk."""
+    archive_size = os.path.getsize(archive_path)
 
+    if filename.endswith(".zip"):
+        with zipfile.ZipFile(archive_path, "r") as zip_ref:
+            infos = [info for info in zip_ref.infolist() if not info.is_dir()]
+        _check_archive_limits(filename, [(i.filename, i.file_size, i.compress_size) for i in infos], archive_size)
+
+        # Each task runs in a copy of the request's context so its metrics keep the endpoint label
+        futures = [
+            _upload_executor.submit(
+                contextvars.copy_context().run, _upload_document,
+                lambda name=info.filename: _open_zip_member(archive_path, name), info.filename, info.file_size, f"{startup_name}/{upload_id}_{info.filename}", known_documents,
+            )
+            for info in infos
+        ]
+        return [future.result() for future in futures]
+
+    if filename.endswith((".tar", ".tar.gz", ".tgz")):
+        # Compressed tars can only be read front to back, so members go up one at a time
+        with tarfile.open(archive_path, "r:*") as tar_ref:
+            members = [m for m in tar_ref.getmembers() if m.isfile()]
+            _check_archive_limits(filename, [(m.name, m.size, None) for m in members], archive_size)
+
+            return [
+                _upload_document(
+                    lambda member=member: tar_ref.extractfile(member), member.name, member.size,
+                    f"{startup_name}/{upload_id}_{member.name}", known_documents, hash_first=False,
+                )
+                for member in members
+            ]
+
+    if filename.endswith(".pdf"):
+        return upload_files_to_gcs([(archive_path, filename)], startup_name, upload_id, known_documents)
+
+    raise ValueError("File must be .pdf, .zip or .tar(.gz)")
+
+
+def _extract_and_upload(archive_path: str, filename: str, startup_name, upload_id, known_documents: dict):
+    if ARCHIVE_EXTRACT_MODE == "stream":
+        return _stream_members_to_gcs(archive_path, filename, startup_name, upload_id, known_documents)
+
+    with tempfile.TemporaryDirectory(dir=UPLOAD_SPOOL_DIR) as tmpdir:
         files_to_process = []
-        if file.filename.endswith(".zip"):
-            with zipfile.ZipFile(file_path, "r") as zip_ref:
+        if filename.endswith(".zip"):
+            with zipfile.ZipFile(archive_path, "r") as zip_ref:
+                infos = [info for info in zip_ref.infolist() if not info.is_dir()]
+                _check_archive_limits(
+                    filename, [(i.filename, i.file_size, i.compress_size) for i in infos],
+                    os.path.getsize(archive_path),
+                )
                 zip_ref.extractall(tmpdir)
                 for fname in zip_ref.namelist():
                     path = os.path.join(tmpdir, fname)
                     if os.path.isfile(path):
                         files_to_process.append((path, fname))
 
-        elif file.filename.endswith((".tar", ".tar.gz", ".tgz")):
-            with tarfile.open(file_path, "r:*") as tar_ref:
+        elif filename.endswith((".tar", ".tar.gz", ".tgz")):
+            with tarfile.open(archive_path, "r:*") as tar_ref:
+                _check_archive_limits(
+                    filename, [(m.name, m.size, None) for m in tar_ref.getmembers() if m.isfile()],
+                    os.path.getsize(archive_path),
+                )
                 tar_ref.extractall(tmpdir)
                 for fname in tar_ref.getnames():
                     path = os.path.join(tmpdir, fname)
                     if os.path.isfile(path):
                         files_to_process.append((path, fname))
 
-        elif file.filename.endswith(".pdf"):
-            files_to_process.append((file_path, file.filename))
+        elif filename.endswith(".pdf"):
+            files_to_process.append((archive_path, filename))
         else:
             raise ValueError("File must be .pdf, .zip or .tar(.gz)")
 
         # ✅ Upload inside the tempdir context
-        for path, fname in files_to_process:
-            blob_name = f"{startup_name}/{upload_id}_{fname}"
-            blob = bucket.blob(blob_name)
-            blob.upload_from_filename(path)
-            uploaded_paths.append(f"gs://{BUCKET_NAME}/{blob_name}")
+        documents = upload_files_to_gcs(files_to_process, startup_name, upload_id, known_documents)
+
+    return documents
+
+
+async def extract_and_upload_file_to_gcs(archive_path: str, filename: str, startup_name, upload_id):
+    """
+    Extract a spooled zip/tar/pdf and upload its new members to GCS.
+    Runs in the threadpool so the event loop is never blocked on disk or network.
+    Returns [{"name", "sha256", "gcs_path", "reused"}, ...]; reused documents
+    point at the copy already in GCS instead of being uploaded again.
+    """
+    # Documents this startup already has in GCS (and in its corpus) are not uploaded again
+    known_documents = await read_document_index(startup_name)
+    return await run_in_threadpool(_extract_and_upload, archive_path, filename, startup_name, upload_id, known_documents)
+
+
+def direct_upload_blob_name(upload_id: str, filename: str) -> str:
+    return f"{DIRECT_UPLOAD_PREFIX}/{upload_id}/{os.path.basename(filename)}"
+
+
+def _signing_credentials() -> dict:
+    """
+    Keyless credentials (Cloud Run, GCE metadata server) cannot sign locally;
+    hand generate_signed_url a fresh token so it signs through the IAM API instead.
+    """
+    credentials = storage_client._credentials
+    if getattr(credentials, "signer", None) is not None:
+        return {}
+    credentials.refresh(google.auth.transport.requests.Request())
+    return {"service_account_email": credentials.service_account_email, "access_token": credentials.token}
+
+
+def create_direct_upload(blob_name: str, content_type: str, size: int = None) -> dict:
+    """
+    Mint a URL the client can write the archive to without going through the gateway.
+    "signed": a V4 signed URL for a single PUT with the given Content-Type.
+    "resumable": a resumable upload session URL; the client PUTs the bytes (optionally
+    in 256 KiB-aligned chunks with Content-Range) and can query it to resume.
+    """
+    blob = bucket.blob(blob_name)
+    if DIRECT_UPLOAD_MODE == "resumable":
+        url = blob.create_resumable_upload_session(content_type=content_type, size=size, origin=DIRECT_UPLOAD_ORIGIN)
+    else:
+        url = blob.generate_signed_url(
+            version="v4",
+            expiration=datetime.timedelta(seconds=DIRECT_UPLOAD_URL_EXPIRY),
+            method="PUT",
+            content_type=content_type,
+            **_signing_credentials(),
+        )
+    return {
+        "mode": DIRECT_UPLOAD_MODE,
+        "upload_url": url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "expires_in": DIRECT_UPLOAD_URL_EXPIRY,
+    }
+
+
+@asynccontextmanager
+async def spool_blob(blob_name: str):
+    """
+    Stream an uploaded object from the bucket to a local spool for extraction.
+    The archive MD5 is the one GCS computed on write (md5Hash); only objects without
+    one (composed from chunks) are hashed on the way, like spool_upload does.
+    Yields (spool_path, md5_hex); raises NotFound if the object was never written.
+    """
+    md5_b64 = (await async_storage.download_metadata(blob_name)).get("md5Hash")
+    hasher = None if md5_b64 else hashlib.md5()
+    size, hash_seconds = 0, 0.0
+    with tempfile.TemporaryDirectory(dir=UPLOAD_SPOOL_DIR) as spool_dir:
+        spool_path = os.path.join(spool_dir, os.path.basename(blob_name))
+        with open(spool_path, "wb") as spool:
+            async for chunk in async_storage.download_stream(blob_name, UPLOAD_CHUNK_SIZE):
+                if hasher is None:
+                    await run_in_threadpool(spool.write, chunk)
+                else:
+                    start = time.perf_counter()
+                    await run_in_threadpool(_hash_and_write, hasher, spool, chunk)
+                    hash_seconds += time.perf_counter() - start
+                size += len(chunk)
+        _observe_spool(size, hash_seconds)
+        yield spool_path, base64.b64decode(md5_b64).hex() if md5_b64 else hasher.hexdigest()
+
+
+async def delete_blob(blob_name: str):
+    await async_storage.delete(blob_name)
+
 
-    return uploaded_paths
+# GCS composes at most this many source objects per request
+_MAX_COMPOSE_SOURCES = 32
+
+
+def _chunk_blob_name(upload_id: str, offset: int) -> str:
+    # Zero-padded so a prefix listing returns chunks in offset order
+    return f"{CHUNKED_UPLOAD_PREFIX}/{upload_id}/{offset:020d}"
+
+
+async def upload_chunk(upload_id: str, offset: int, data: bytes, md5_b64: str):
+    """Store one chunk; GCS rejects the write if the bytes do not match md5_b64."""
+    await async_storage.upload(_chunk_blob_name(upload_id, offset), data, md5_b64=md5_b64)
+
+
+async def compose_chunks(upload_id: str, offsets: list, blob_name: str):
+    """
+    Reassemble the chunks at offsets (ascending) into blob_name, composing in
+    rounds of _MAX_COMPOSE_SOURCES, then delete the chunk and intermediate objects.
+    """
+    chunks = [_chunk_blob_name(upload_id, offset) for offset in offsets]
+    sources = chunks
+    intermediates = []
+    level = 0
+    while len(sources) > _MAX_COMPOSE_SOURCES:
+        groups = [sources[i:i + _MAX_COMPOSE_SOURCES] for i in range(0, len(sources), _MAX_COMPOSE_SOURCES)]
+        sources = [f"{CHUNKED_UPLOAD_PREFIX}/{upload_id}/compose-{level}-{i:05d}" for i in range(len(groups))]
+        await asyncio.gather(*(async_storage.compose(name, group) for name, group in zip(sources, groups)))
+        intermediates.extend(sources)
+        level += 1
+    await async_storage.compose(blob_name, sources)
+
+    await asyncio.gather(*(async_storage.delete(name) for name in chunks + intermediates))
+
+
+async def list_upload_objects() -> dict:
+    """
+    {upload_id: [(blob_name, updated), ...]} of the chunk and direct-upload objects in the
+    bucket, updated in epoch seconds.
+    """
+    listings = await asyncio.gather(*(
+        async_storage.list_objects(f"{prefix}/", fields="items(name,updated),nextPageToken")
+        for prefix in (CHUNKED_UPLOAD_PREFIX, DIRECT_UPLOAD_PREFIX)
+    ))
+    uploads = {}
+    for item in (item for listing in listings for item in listing):
+        parts = item["name"].split("/")
+        if len(parts) < 3:
+            continue
+        updated = datetime.datetime.fromisoformat(item["updated"].replace("Z", "+00:00")).timestamp()
+        uploads.setdefault(parts[1], []).append((item["name"], updated))
+    return uploads
+
+
+MANIFEST_PREFIX = "manifests"
+
+
+async def read_manifest(upload_id: str):
+    """
+    Completion manifest written by the workers (manifests/<upload_id>.json):
+    {"analysis": {"status", "pdf_url", ...}, "infographic": {"status", "image_urls", ...}}
+    Returns None until the first worker finishes.
+    """
+    return await async_storage.download_json(f"{MANIFEST_PREFIX}/{upload_id}.json")
+
+
+async def read_manifests(upload_ids: list, seen_generations: dict = None) -> dict:
+    """
+    {upload_id: (manifest, generation)} for the uploads whose manifest exists and has changed
+    since the generation in seen_generations. Which manifests exist, and their generations,
+    comes from one object listing per MANIFEST_LIST_BATCH_SIZE uploads (a matchGlob over their
+    names); only new or changed manifests are downloaded, so a pending upload costs at most
+    one read per worker that finishes rather than one per status refresh.
+    upload_ids must be ones the gateway issued (UUIDs), since they are spliced into the glob.
+    """
+    seen_generations = seen_generations or {}
+    wanted = set(upload_ids)
+    listings = await asyncio.gather(*(
+        async_storage.list_objects(
+            f"{MANIFEST_PREFIX}/",
+            match_glob=f"{MANIFEST_PREFIX}/{{{','.join(batch)}}}.json",
+        )
+        for batch in (upload_ids[i:i + MANIFEST_LIST_BATCH_SIZE] for i in range(0, len(upload_ids), MANIFEST_LIST_BATCH_SIZE))
+    ))
+    changed = {}
+    for item in (item for listing in listings for item in listing):
+        upload_id = item["name"][len(MANIFEST_PREFIX) + 1:-len(".json")]
+        if upload_id in wanted and item["generation"] != seen_generations.get(upload_id):
+            changed[upload_id] = item["generation"]
+
+    manifests = await asyncio.gather(*(read_manifest(upload_id) for upload_id in changed))
+    return {
+        upload_id: (manifest, generation)
+        for (upload_id, generation), manifest in zip(changed.items(), manifests)
+        if manifest is not None
+    }
+
+
+DOCUMENT_INDEX_PREFIX = "doc_index"
+
+
+async def read_document_index(startup_name: str) -> dict:
+    """
+    Per-startup index of documents already imported into the startup's corpus,
+    maintained by data-manager: {sha256: {"gcs_path", "name", ...}}.
+    """
+    index = await async_storage.download_json(f"{DOCUMENT_INDEX_PREFIX}/{startup_name}.json")
+    return (index or {}).get("documents", {})
@@ -0,0 +1,189 @@
+from abc import ABC, abstractmethod
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import JOB_STORE_BACKEND, JOB_STORE_PATH, JOB_STORE_REDIS_URL, JOB_TTL_SECONDS
+
+
+class JobStore(ABC):
+    """
+    Per-upload_id job state (startup name, stage, artifact URLs, ...) shared by
+    every gateway worker. Records are flat dicts of JSON-serialisable fields and
+    expire JOB_TTL_SECONDS after their last update.
+    """
+
+    def create(self, upload_id: str, **fields) -> dict:
+        return self.update(upload_id, created_at=time.time(), **fields)
+
+    @abstractmethod
+    def get(self, upload_id: str) -> Optional[dict]:
+        ...
+
+    def get_many(self, upload_ids: list) -> dict:
+        """{upload_id: record} for the ids that exist, in one round trip where the backend allows."""
+        jobs = {upload_id: self.get(upload_id) for upload_id in upload_ids}
+        return {upload_id: job for upload_id, job in jobs.items() if job is not None}
+
+    @abstractmethod
+    def update(self, upload_id: str, **fields) -> dict:
+        """Merge fields into the record (creating it if needed) and refresh its TTL."""
+
+    @abstractmethod
+    def update_if_stage(self, upload_id: str, expected_stage: str, **fields) -> Optional[dict]:
+        """
+        update() only if the record exists and is at expected_stage, as one atomic step across all
+        gateway workers. Returns the updated record, or None if the stage did not match.
+        """
+
+
+class SQLiteJobStore(JobStore):
+    """Single-node store; safe to share between uvicorn workers on one host."""
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "upload_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE upload_id = ? AND expires_at > ?", (upload_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, upload_ids: list) -> dict:
+        jobs = {}
+        now = time.time()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(upload_ids), 500):
+            batch = upload_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT upload_id, data FROM jobs WHERE upload_id IN ({placeholders}) AND expires_at > ?",
+                    (*batch, now),
+                ).fetchall()
+            jobs.update((upload_id, json.loads(data)) for upload_id, data in rows)
+        return jobs
+
+    def update(self, upload_id: str, **fields) -> dict:
+        return self._write(upload_id, fields)
+
+    def update_if_stage(self, upload_id: str, expected_stage: str, **fields) -> Optional[dict]:
+        return self._write(upload_id, fields, expected_stage=expected_stage)
+
+    def _write(self, upload_id: str, fields: dict, expected_stage: str = None) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the database write lock, so the read-check-write below
+            # cannot interleave with another worker's
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Evict expired jobs as part of normal writes
+                self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+                row = self._conn.execute("SELECT data FROM jobs WHERE upload_id = ?", (upload_id,)).fetchone()
+                record = json.loads(row[0]) if row else {"upload_id": upload_id}
+                if expected_stage is not None and record.get("stage") != expected_stage:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                record.update(fields)
+                record["updated_at"] = now
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs (upload_id, data, expires_at) VALUES (?, ?, ?)",
+                    (upload_id, json.dumps(record), now + self.ttl_seconds),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return record
+
+
+class RedisJobStore(JobStore):
+    """Cluster store for any Redis-protocol server; fields are kept in one hash per job."""
+
+    KEY_PREFIX = "gateway:job:"
+
+    # HSET only while the stored stage (a JSON string) is still ARGV[1]
+    _UPDATE_IF_STAGE_SCRIPT = """
+    if redis.call('HGET', KEYS[1], 'stage') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("redis is required for JOB_STORE_BACKEND=redis. Install with: pip install redis") from e
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(url)
+        self._update_if_stage_script = self._client.register_script(self._UPDATE_IF_STAGE_SCRIPT)
+
+    def _key(self, upload_id: str) -> str:
+        return f"{self.KEY_PREFIX}{upload_id}"
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        raw = self._client.hgetall(self._key(upload_id))
+        if not raw:
+            return None
+        return {k.decode("utf-8"): json.loads(v) for k, v in raw.items()}
+
+    def get_many(self, upload_ids: list) -> dict:
+        pipe = self._client.pipeline(transaction=False)
+        for upload_id in upload_ids:
+            pipe.hgetall(self._key(upload_id))
+        return {
+            upload_id: {k.decode("utf-8"): json.loads(v) for k, v in raw.items()}
+            for upload_id, raw in zip(upload_ids, pipe.execute())
+            if raw
+        }
+
+    def update(self, upload_id: str, **fields) -> dict:
+        fields["upload_id"] = upload_id
+        fields["updated_at"] = time.time()
+        key = self._key(upload_id)
+        pipe = self._client.pipeline()
+        pipe.hset(key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+        return self.get(upload_id) or fields
+
+    def update_if_stage(self, upload_id: str, expected_stage: str, **fields) -> Optional[dict]:
+        fields["upload_id"] = upload_id
+        fields["updated_at"] = time.time()
+        pairs = [item for k, v in fields.items() for item in (k, json.dumps(v))]
+        updated = self._update_if_stage_script(
+            keys=[self._key(upload_id)], args=[json.dumps(expected_stage), self.ttl_seconds, *pairs],
+        )
+        return self.get(upload_id) if updated else None
+
+
+def job_finished(job: dict) -> bool:
+    """True once the job failed outright or both the PDF and the images are resolved."""
+    return job.get("stage") == "failed" or (
+        bool(job.get("pdf_url") or job.get("pdf_error")) and bool(job.get("image_urls") or job.get("images_error"))
+    )
+
+
+def create_job_store() -> JobStore:
+    if JOB_STORE_BACKEND == "redis":
+        return RedisJobStore(JOB_STORE_REDIS_URL, JOB_TTL_SECONDS)
+    if JOB_STORE_BACKEND == "sqlite":
+        return SQLiteJobStore(JOB_STORE_PATH, JOB_TTL_SECONDS)
+    raise ValueError(f"Unknown JOB_STORE_BACKEND: {JOB_STORE_BACKEND}")
+
+
+job_store = create_job_store()
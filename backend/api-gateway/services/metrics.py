@@ -0,0 +1,95 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, make_asgi_app, multiprocess
+
+# {"endpoint": route path} of the request being served, filled in once routing has matched.
+# Worker threads see the same holder through copied contexts.
+_endpoint: ContextVar[Optional[dict]] = ContextVar("endpoint", default=None)
+
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+_BYTES_BUCKETS = tuple(2 ** n for n in range(10, 33, 2))  # 1 KiB .. 4 GiB
+
+REQUEST_SECONDS = Histogram(
+    "gateway_request_duration_seconds", "Request latency, including status checks", ["endpoint"],
+    buckets=_SECONDS_BUCKETS,
+)
+UPLOAD_BYTES = Histogram("gateway_upload_size_bytes", "Size of received archives", ["endpoint"], buckets=_BYTES_BUCKETS)
+HASH_SECONDS = Histogram(
+    "gateway_hash_seconds", "Time spent hashing and spooling an archive", ["endpoint"], buckets=_SECONDS_BUCKETS,
+)
+EXTRACTION_SECONDS = Histogram(
+    "gateway_extraction_seconds", "Extraction and upload of an archive's documents", ["endpoint"],
+    buckets=_SECONDS_BUCKETS,
+)
+GCS_UPLOAD_SECONDS = Histogram(
+    "gateway_gcs_upload_seconds", "Upload latency of one document to GCS", ["endpoint"], buckets=_SECONDS_BUCKETS,
+)
+PUBLISH_SECONDS = Histogram(
+    "gateway_publish_seconds", "Time until a Pub/Sub publish is acknowledged", ["endpoint"], buckets=_SECONDS_BUCKETS,
+)
+DEMO_SHORTCUT_HITS = Counter("gateway_demo_shortcut_hits_total", "Uploads answered with the pinned demo report", ["endpoint"])
+CACHE_HITS = Counter("gateway_report_cache_hits_total", "Uploads answered from the report cache", ["endpoint"])
+UPLOADS_IN_FLIGHT = Gauge(
+    "gateway_uploads_in_flight", "Upload requests currently being processed", ["endpoint"], multiprocess_mode="livesum",
+)
+
+
+def current_endpoint() -> str:
+    holder = _endpoint.get()
+    return holder["endpoint"] if holder else "background"
+
+
+async def label_endpoint(request: Request):
+    """Router dependency: label the request's metrics with the matched route path."""
+    holder = _endpoint.get()
+    route = request.scope.get("route")
+    if holder is not None and route is not None:
+        holder["endpoint"] = route.path
+
+
+@contextmanager
+def timed(histogram: Histogram):
+    """Observe the duration of the block on histogram, labelled with the current endpoint."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(current_endpoint()).observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency per endpoint. Requests that match no route (label_endpoint
+    never runs) share one "other" label, so scanners cannot blow up the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/metrics"):
+            await self.app(scope, receive, send)
+            return
+
+        holder = {"endpoint": "other"}
+        token = _endpoint.set(holder)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUEST_SECONDS.labels(holder["endpoint"]).observe(time.perf_counter() - start)
+            _endpoint.reset(token)
+
+
+def metrics_app():
+    """ASGI app serving /metrics; aggregates all uvicorn workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_asgi_app(registry=registry)
+    return make_asgi_app()
@@ -1,13 +1,67 @@
-from google.cloud import pubsub_v1
 import json
-from config import PROJECT_ID
+import threading
+from google.cloud import pubsub_v1
+from config import PROJECT_ID, PUBSUB_BATCH_MAX_MESSAGES, PUBSUB_BATCH_MAX_BYTES, PUBSUB_BATCH_MAX_LATENCY
+
+# One batching publisher (one gRPC channel) per process, created on first use
+_publisher = None
+_topic_paths = {}
+_lock = threading.Lock()
+
+
+def _get_publisher() -> pubsub_v1.PublisherClient:
+    global _publisher
+    with _lock:
+        if _publisher is None:
+            _publisher = pubsub_v1.PublisherClient(
+                batch_settings=pubsub_v1.types.BatchSettings(
+                    max_messages=PUBSUB_BATCH_MAX_MESSAGES,
+                    max_bytes=PUBSUB_BATCH_MAX_BYTES,
+                    max_latency=PUBSUB_BATCH_MAX_LATENCY,
+                ),
+                # Messages sharing an ordering key (the upload_id) are delivered in publish order
+                publisher_options=pubsub_v1.types.PublisherOptions(enable_message_ordering=True),
+            )
+        return _publisher
+
 
+def _topic_path(publisher: pubsub_v1.PublisherClient, topic_id: str) -> str:
+    path = _topic_paths.get(topic_id)
+    if path is None:
+        path = _topic_paths[topic_id] = publisher.topic_path(PROJECT_ID, topic_id)
+    return path
 
-def publish_message(topic_id: str, message: dict):
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = publisher.topic_path(PROJECT_ID, topic_id)
+
+def publish_message(topic_id: str, message: dict, on_done=None, ordering_key: str = ""):
+    """
+    Queue message on the shared publisher and return its future without waiting.
+    on_done(future) runs once the batch containing the message has been sent or has failed.
+    """
+    publisher = _get_publisher()
+    topic_path = _topic_path(publisher, topic_id)
 
     data = json.dumps(message).encode("utf-8")
-    future = publisher.publish(topic_path, data)
-    print(f"📨 Published to {topic_path}: {message}")
-    return future.result()
+    future = publisher.publish(topic_path, data, ordering_key=ordering_key or "")
+
+    def _log_outcome(f):
+        try:
+            print(f"📨 Published to {topic_path} (id={f.result()}): {message}")
+        except Exception as e:
+            print(f"❌ Publish to {topic_path} failed: {e}")
+            if ordering_key:
+                # A failed publish pauses its ordering key until it is resumed
+                publisher.resume_publish(topic_path, ordering_key)
+
+    future.add_done_callback(_log_outcome)
+    if on_done is not None:
+        future.add_done_callback(on_done)
+    return future
+
+
+def shutdown_publisher():
+    """Send every batched message and close the publisher (call on shutdown)."""
+    global _publisher
+    with _lock:
+        if _publisher is not None:
+            _publisher.stop()
+            _publisher = None
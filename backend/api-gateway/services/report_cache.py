@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import (
+    JOB_STORE_BACKEND, JOB_STORE_PATH, JOB_STORE_REDIS_URL,
+    REPORT_CACHE_ENABLED, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES,
+    STARTUP_NAME, ZIP_MD5, PDF_URL, IMAGE_URL,
+)
+
+# Canned demo report, always served and never evicted
+_PINNED = {
+    (STARTUP_NAME, ZIP_MD5): {"pdf_url": PDF_URL, "image_urls": IMAGE_URL, "upload_id": None},
+}
+
+
+class ReportCache(ABC):
+    """
+    Maps (startup_name, archive MD5) to the report and infographic artifacts generated
+    for an earlier identical upload. Entries expire REPORT_CACHE_TTL_SECONDS after they
+    were last used, and the least recently used are evicted beyond REPORT_CACHE_MAX_ENTRIES.
+    Lives in the same backend as the job store.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _key(startup_name: str, archive_md5: str) -> str:
+        return f"{startup_name}:{archive_md5}"
+
+    def lookup(self, startup_name: str, archive_md5: str) -> Optional[dict]:
+        pinned = _PINNED.get((startup_name, archive_md5))
+        if pinned:
+            return pinned
+        if not REPORT_CACHE_ENABLED:
+            return None
+        return self._get_and_touch(self._key(startup_name, archive_md5))
+
+    def store(self, startup_name: str, archive_md5: str, pdf_url: str, image_urls: list, upload_id: str):
+        if not REPORT_CACHE_ENABLED:
+            return
+        entry = {"pdf_url": pdf_url, "image_urls": image_urls, "upload_id": upload_id, "created_at": time.time()}
+        self._put(self._key(startup_name, archive_md5), entry)
+
+    def store_completed_job(self, job: dict):
+        """Cache a job's artifacts once both the PDF and the images exist."""
+        if job.get("archive_md5") and job.get("pdf_url") and job.get("image_urls") and not job.get("cached_from"):
+            self.store(job["startup_name"], job["archive_md5"], job["pdf_url"], job["image_urls"], job["upload_id"])
+
+    @abstractmethod
+    def _get_and_touch(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def _put(self, key: str, entry: dict):
+        ...
+
+
+class SQLiteReportCache(ReportCache):
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_cache ("
+            "cache_key TEXT PRIMARY KEY, data TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS report_cache_last_used ON report_cache (last_used)")
+
+    def _get_and_touch(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM report_cache WHERE cache_key = ? AND last_used > ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE report_cache SET last_used = ? WHERE cache_key = ?", (now, key))
+        return json.loads(row[0]) if row else None
+
+    def _put(self, key: str, entry: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO report_cache (cache_key, data, last_used) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry), now),
+                )
+                self._conn.execute("DELETE FROM report_cache WHERE last_used <= ?", (now - self.ttl_seconds,))
+                self._conn.execute(
+                    "DELETE FROM report_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM report_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class RedisReportCache(ReportCache):
+    KEY_PREFIX = "gateway:report:"
+    LRU_KEY = "gateway:report-lru"
+
+    def __init__(self, url: str, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("redis is required for JOB_STORE_BACKEND=redis. Install with: pip install redis") from e
+        self._client = redis.Redis.from_url(url)
+
+    def _get_and_touch(self, key: str) -> Optional[dict]:
+        raw = self._client.get(self.KEY_PREFIX + key)
+        if raw is None:
+            return None
+        pipe = self._client.pipeline()
+        pipe.expire(self.KEY_PREFIX + key, self.ttl_seconds)
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.execute()
+        return json.loads(raw)
+
+    def _put(self, key: str, entry: dict):
+        pipe = self._client.pipeline()
+        pipe.set(self.KEY_PREFIX + key, json.dumps(entry), ex=self.ttl_seconds)
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.execute()
+
+        # Trim least recently used entries beyond the limit
+        evicted = self._client.zrange(self.LRU_KEY, 0, -(self.max_entries + 1))
+        if evicted:
+            pipe = self._client.pipeline()
+            pipe.delete(*[self.KEY_PREFIX + k.decode("utf-8") for k in evicted])
+            pipe.zrem(self.LRU_KEY, *evicted)
+            pipe.execute()
+
+
+def create_report_cache() -> ReportCache:
+    if JOB_STORE_BACKEND == "redis":
+        return RedisReportCache(JOB_STORE_REDIS_URL, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES)
+    return SQLiteReportCache(JOB_STORE_PATH, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES)
+
+
+report_cache = create_report_cache()
@@ -0,0 +1,89 @@
+import json
+import time
+from google.cloud import pubsub_v1
+from config import PROJECT_ID, RESULT_SUBSCRIPTIONS
+from services.job_store import job_store
+from services.report_cache import report_cache
+from services.admission import admission
+
+_subscriber = None
+_futures = []
+
+
+def record_result(payload: dict):
+    """Fold one import, progress or result message into the job store."""
+    upload_id = payload.get("upload_id")
+    if not upload_id:
+        print(f"⚠️ Result without upload_id ignored: {payload.get('request_id')}")
+        return
+
+    service_name = payload.get("service_name")
+
+    # data-manager's retrieve-data message: the corpus import has finished
+    if "rag_corpus" in payload and "status" not in payload:
+        job_store.update(upload_id, stage="imported", rag_corpus=payload["rag_corpus"])
+        print(f"📥 Recorded import for upload_id={upload_id}")
+        return
+
+    if payload.get("status") == "progress":
+        job_store.update(upload_id, **{f"section:{service_name}:{payload.get('section')}": time.time()})
+        return
+
+    failed = payload.get("status") != "completed"
+
+    if service_name == "analysis_service":
+        pdf_url = payload.get("pdf_url")
+        if failed or not pdf_url:
+            job = job_store.update(upload_id, pdf_error=payload.get("pdf_error") or payload.get("error") or "unknown error")
+        else:
+            job = job_store.update(upload_id, pdf_url=pdf_url)
+
+    elif service_name == "infographic-service":
+        # The infographic worker reports its images under "pdf_url" as {"image_urls": [...]}
+        image_urls = (payload.get("pdf_url") or {}).get("image_urls")
+        if failed or not image_urls:
+            job = job_store.update(upload_id, images_error=payload.get("pdf_error") or payload.get("error") or "unknown error")
+        else:
+            job = job_store.update(upload_id, image_urls=image_urls)
+
+    else:
+        print(f"⚠️ Result from unknown service {service_name} for upload_id={upload_id}")
+        return
+
+    report_cache.store_completed_job(job)
+    admission.release_if_finished(job)
+    print(f"📥 Recorded {service_name} result for upload_id={upload_id}")
+
+
+def _callback(message: pubsub_v1.subscriber.message.Message):
+    try:
+        record_result(json.loads(message.data.decode("utf-8")))
+        message.ack()
+    except json.JSONDecodeError as e:
+        print(f"❌ Undecodable result message {message.message_id}: {e}")
+        message.ack()
+    except Exception as e:
+        print(f"❌ Error recording result {message.message_id}: {e}")
+        message.nack()
+
+
+def start_result_subscriber():
+    """Start background streaming pulls on RESULT_SUBSCRIPTIONS (no-op if none configured)."""
+    global _subscriber
+    if not RESULT_SUBSCRIPTIONS or _subscriber is not None:
+        return
+    _subscriber = pubsub_v1.SubscriberClient()
+    for subscription_id in RESULT_SUBSCRIPTIONS:
+        subscription_path = _subscriber.subscription_path(PROJECT_ID, subscription_id)
+        _futures.append(_subscriber.subscribe(subscription_path, callback=_callback))
+        print(f"📡 Listening for results on {subscription_path}")
+
+
+def stop_result_subscriber():
+    global _subscriber
+    for future in _futures:
+        future.cancel()
+    _futures.clear()
+    if _subscriber is not None:
+        _subscriber.close()
+        _subscriber = None
@@ -5,3 +5,51 @@ BUCKET_NAME = os.getenv("BUCKET_NAME", "pitchdeck-storage-289")
 GOOGLE_CLOUD_LOCATION=os.getenv("GOOGLE_CLOUD_LOCATION","europe-west3")
 CORPUS_ID = os.getenv("CORPUS_ID","projects/aianalyst-redflaggers/locations/europe-west3/ragCorpora/2305843009213693952")
 CORPUS_DISPLAY_NAME = os.getenv("CORPUS_DISPLAY_NAME", "startup-docs")
+
+# Shared startup (display name) -> corpus id index, kept in the bucket and read by every replica
+CORPUS_INDEX_BLOB = os.getenv("CORPUS_INDEX_BLOB", "corpus_index/corpora.json")
+
+# Concurrent corpus imports, and how many manage-data messages may be leased (and lease-extended) at once
+IMPORT_MAX_CONCURRENCY = int(os.getenv("IMPORT_MAX_CONCURRENCY", "8"))
+SUBSCRIBER_MAX_MESSAGES = int(os.getenv("SUBSCRIBER_MAX_MESSAGES", "32"))
+SUBSCRIBER_MAX_BYTES = int(os.getenv("SUBSCRIBER_MAX_BYTES", str(10 * 1024 * 1024)))
+SUBSCRIBER_MAX_LEASE_SECONDS = int(os.getenv("SUBSCRIBER_MAX_LEASE_SECONDS", "3600"))
+
+# Imports into the same corpus run one at a time; requests arriving within the window share one import_files call
+IMPORT_COALESCE_WINDOW_SECONDS = float(os.getenv("IMPORT_COALESCE_WINDOW_SECONDS", "5"))
+IMPORT_COALESCE_MAX_PATHS = int(os.getenv("IMPORT_COALESCE_MAX_PATHS", "25"))  # Vertex AI limit per import_files call
+
+# Dedupe ledger ({LEDGER_PREFIX}/<upload_id>/<stage>.json): completed stages are skipped for the TTL,
+# an in-progress claim is honoured until its lease expires and duplicates poll until it finishes
+LEDGER_PREFIX = os.getenv("LEDGER_PREFIX", "ledger")
+LEDGER_TTL_SECONDS = int(os.getenv("LEDGER_TTL_SECONDS", str(7 * 24 * 3600)))
+LEDGER_LEASE_SECONDS = int(os.getenv("LEDGER_LEASE_SECONDS", "3600"))
+LEDGER_POLL_SECONDS = float(os.getenv("LEDGER_POLL_SECONDS", "15"))
+
+# Failed imports are classified (transient / quota / permanent) and retried with jittered exponential
+# backoff, the delay being held by Pub/Sub (10-600 s); after RETRY_MAX_ATTEMPTS, or on a permanent
+# failure, the message is parked on the dead-letter topic with a diagnostic record
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = int(os.getenv("RETRY_BASE_SECONDS", "30"))
+RETRY_QUOTA_BASE_SECONDS = int(os.getenv("RETRY_QUOTA_BASE_SECONDS", "120"))
+RETRY_MAX_DELAY_SECONDS = int(os.getenv("RETRY_MAX_DELAY_SECONDS", "600"))
+DEAD_LETTER_TOPIC_ID = os.getenv("DEAD_LETTER_TOPIC_ID", "manage-data-dead-letter")
+
+# Local text extraction of PDF/PPTX/DOCX documents into {startup}/extracted/<sha256>.json.gz
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))  # parser processes
+EXTRACTION_MAX_BYTES = int(os.getenv("EXTRACTION_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Near-duplicate pages (same deck as PDF and PPTX, revisions) are found with MinHash/LSH over the
+# extracted pages and left out of the import; pages at least DEDUP_SIMILARITY_THRESHOLD similar
+# (estimated Jaccard over DEDUP_SHINGLE_WORDS-word shingles) count as duplicates
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_LSH_BANDS = int(os.getenv("DEDUP_LSH_BANDS", "16"))  # must divide DEDUP_NUM_PERM
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "25"))  # shorter pages are always kept
+
+# Pub/Sub publishing: one batching client per process; a batch is sent when any limit is reached
+PUBSUB_BATCH_MAX_MESSAGES = int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", "100"))
+PUBSUB_BATCH_MAX_BYTES = int(os.getenv("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024)))
+PUBSUB_BATCH_MAX_LATENCY = float(os.getenv("PUBSUB_BATCH_MAX_LATENCY", "0.01"))  # seconds
@@ -1,67 +1,223 @@
+import asyncio
 import json
+import time
 from google.cloud import pubsub_v1
-from config import PROJECT_ID, GOOGLE_CLOUD_LOCATION
-from services.pubsub_utils import publish_message
-from services.corpus_manager import upload_gcs_pdf_to_corpus, create_or_get_corpus
+from config import (
+    PROJECT_ID, GOOGLE_CLOUD_LOCATION,
+    SUBSCRIBER_MAX_MESSAGES, SUBSCRIBER_MAX_BYTES, SUBSCRIBER_MAX_LEASE_SECONDS,
+    LEDGER_POLL_SECONDS, RETRY_MAX_ATTEMPTS, DEDUP_ENABLED,
+)
+from services.pubsub_utils import publish_message, shutdown_publisher
+from services.corpus_manager import create_or_get_corpus
+from services.import_scheduler import import_to_corpus
+from services.extraction import extract_documents, shutdown_extraction
+from services.near_duplicates import plan_import, record_page_signatures
+from services.document_index import record_imported_documents
+from services.corpus_index import warm_corpus_index
+from services.ledger import (
+    claim, complete, defer, park, get as ledger_get,
+    CLAIMED, IN_PROGRESS, COMPLETED, RETRYING, DEAD_LETTERED,
+)
+from services.retry import classify, should_retry, backoff_seconds, retry_later, dead_letter
+from services.import_runner import start_import_runner, stop_import_runner, submit, run_blocking
 import vertexai
 import os
 
 SUBSCRIPTION_ID = "manage-data-sub"
 TOPIC_ID = "retrieve-data"
+IMPORT_STAGE = "import"
 
 
-def callback(message: pubsub_v1.subscriber.message.Message):
-    print(f"\n📩 Received message: {message.data.decode('utf-8')}")
-    try:
-        payload = json.loads(message.data.decode("utf-8"))
-        gcs_path = payload.get("gcs_path", [])
-        startup_name = payload.get("startup_name", "unknown")
-        upload_id = payload.get("upload_id")
+async def handle_message(message: pubsub_v1.subscriber.message.Message, payload: dict):
+    gcs_path = payload.get("gcs_path", [])
+    existing_paths = payload.get("existing_paths", [])
+    startup_name = payload.get("startup_name", "unknown")
+    upload_id = payload.get("upload_id")
+
+    if not gcs_path and not existing_paths:
+        print("⚠️ No google cloud path found in message")
+        message.ack()
+        return
+
+    # Redeliveries of an upload skip a finished import and wait for one that is still running
+    state, entry = await run_blocking(claim, upload_id, IMPORT_STAGE) if upload_id else (CLAIMED, None)
+    while state == IN_PROGRESS:
+        print(f"⏳ Import for upload_id={upload_id} is in progress elsewhere, waiting")
+        await asyncio.sleep(LEDGER_POLL_SECONDS)
+        state, entry = await run_blocking(claim, upload_id, IMPORT_STAGE)
+
+    if state == RETRYING:
+        # Failed before and waiting out its backoff; come back when the retry is due
+        retry_later(message, entry["expires_at"] - time.time())
+        return
+    if state == DEAD_LETTERED:
+        print(f"🪦 upload_id={upload_id} was dead-lettered, dropping duplicate message")
+        message.ack()
+        return
 
-        if not gcs_path:
-            print("⚠️ No google cloud path found in message")
+    if state == COMPLETED:
+        if entry.get("published"):
+            print(f"♻️ Duplicate message for upload_id={upload_id}, already imported and handed off")
             message.ack()
             return
+        CORPUS_ID = entry["rag_corpus"]
+    else:
+        CORPUS_ID = await import_documents(payload)
+        if upload_id:
+            await run_blocking(complete, upload_id, IMPORT_STAGE, rag_corpus=CORPUS_ID)
 
-        #for gcs_uri in gcs_path:
+    def on_published(future):
+        # Only ack once the analyse request is safely out; otherwise let Pub/Sub redeliver
+        if future.exception() is None:
+            print(f"🚀 Published analyse request for {startup_name}/{upload_id}")
+            if upload_id:
+                try:
+                    complete(upload_id, IMPORT_STAGE, rag_corpus=CORPUS_ID, published=True)
+                except Exception as e:
+                    # Worst case a redelivery publishes again, which the workers' ledger absorbs
+                    print(f"⚠️ Could not record hand-off for upload_id={upload_id}: {e}")
+            message.ack()
+        else:
+            message.nack()
+
+    # 2. Publish message to "analyse-data"
+    publish_message(TOPIC_ID, {
+        "startup_name": startup_name,
+        "upload_id": upload_id,
+        "rag_corpus": CORPUS_ID
+    }, on_done=on_published, ordering_key=upload_id)
+
+
+async def import_documents(payload: dict) -> str:
+    gcs_path = payload.get("gcs_path", [])
+    startup_name = payload.get("startup_name", "unknown")
+    upload_id = payload.get("upload_id")
 
-        CORPUS_ID = create_or_get_corpus(startup_name)
+    #for gcs_uri in gcs_path:
+
+    CORPUS_ID = await run_blocking(create_or_get_corpus, startup_name)
+    if gcs_path:
         print(f"📤 Uploading {gcs_path} to Vertex AI corpus {CORPUS_ID} [startup={startup_name}]")
-        
-        upload_gcs_pdf_to_corpus(corpus_id = CORPUS_ID,
-                                    gcs_path = gcs_path,
-                                    startup_name = startup_name
-                                    )
+
+        documents = payload.get("documents", [])
+        extraction = None
+        if DEDUP_ENABLED:
+            # Near-duplicate pages are found in the extracted text and left out of the import
+            await extract_documents(startup_name, documents)
+            import_paths, page_signatures = await plan_import(startup_name, gcs_path, documents)
+        else:
+            import_paths, page_signatures = gcs_path, {}
+            # Local extraction runs alongside the import and never fails it
+            extraction = asyncio.ensure_future(extract_documents(startup_name, documents))
+
+        # May share one import with other uploads for this corpus; each message still gets its own publish
+        response = None
+        if import_paths:
+            response = await import_to_corpus(corpus_id = CORPUS_ID,
+                                        gcs_path = import_paths,
+                                        startup_name = startup_name
+                                        )
+        if extraction is not None:
+            await extraction
+        if not getattr(response, "failed_rag_files_count", 0):
+            await run_blocking(record_imported_documents, startup_name, CORPUS_ID, documents)
+            await run_blocking(record_page_signatures, startup_name, page_signatures)
 
         print(f"✅ Upload complete for upload_id={upload_id}, startup={startup_name}")
-        
-        # 2. Publish message to "analyse-data"
-        publish_message(TOPIC_ID, {
-            "startup_name": startup_name,
-            "upload_id": upload_id,
-            "rag_corpus": CORPUS_ID
-        })
-        print(f"🚀 Published analyse request for {startup_name}/{upload_id}")
-        message.ack()
+    else:
+        # Every document is already in the corpus from an earlier upload
+        print(f"♻️ Nothing new to import for upload_id={upload_id}, startup={startup_name}")
+    return CORPUS_ID
 
+
+async def handle_failure(message: pubsub_v1.subscriber.message.Message, payload, error: Exception):
+    """Retry the message later with backoff, or park it on the dead-letter topic."""
+    upload_id = payload.get("upload_id") if isinstance(payload, dict) else None
+    classification = classify(error)
+    entry = await run_blocking(ledger_get, upload_id, IMPORT_STAGE) if upload_id else None
+    attempts = (entry or {}).get("attempts", 0) + 1
+
+    # Attempts are counted in the ledger, so only messages with an upload_id can be retried
+    if upload_id and should_retry(classification, attempts):
+        delay = backoff_seconds(classification, attempts)
+        print(f"🔁 {classification} failure for upload_id={upload_id} "
+              f"(attempt {attempts}/{RETRY_MAX_ATTEMPTS}), retrying in {delay}s: {error}")
+        await run_blocking(defer, upload_id, IMPORT_STAGE, time.time() + delay,
+                           attempts=attempts, classification=classification, error=str(error))
+        retry_later(message, delay)
+        return
+
+    print(f"🪦 Dead-lettering message for upload_id={upload_id} after {attempts} attempt(s) ({classification}): {error}")
+    if upload_id:
+        await run_blocking(park, upload_id, IMPORT_STAGE,
+                           attempts=attempts, classification=classification, error=str(error))
+
+    def on_parked(future):
+        if future.exception() is None:
+            message.ack()
+        else:
+            message.nack()
+
+    dead_letter(payload, error, classification, attempts, on_done=on_parked)
+
+
+async def process_message(message: pubsub_v1.subscriber.message.Message, payload):
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError(f"Expected a JSON object, got {type(payload).__name__}")
+        await handle_message(message, payload)
     except Exception as e:
-        print(f"❌ Error processing message: {e}")
-        message.nack()
+        await handle_failure(message, payload, e)
+
+
+def callback(message: pubsub_v1.subscriber.message.Message):
+    """
+    Hand the message to the import loop and return at once. The client library keeps
+    extending its lease (up to SUBSCRIBER_MAX_LEASE_SECONDS) until it is acked or nacked.
+    """
+    print(f"\n📩 Received message: {message.data.decode('utf-8')}")
+
+    def on_handled(future):
+        # Only reached if the failure could not be recorded either (e.g. the bucket is unreachable)
+        if future.exception() is not None:
+            print(f"❌ Error processing message: {future.exception()}")
+            message.nack()
+
+    try:
+        payload = json.loads(message.data.decode("utf-8"))
+    except ValueError as e:
+        # Undecodable messages can never succeed; park them instead of redelivering forever
+        payload = {"raw": message.data.decode("utf-8", errors="replace")}
+        submit(handle_failure(message, payload, e)).add_done_callback(on_handled)
+        return
+    submit(process_message(message, payload)).add_done_callback(on_handled)
 
 def main():
     print("Starting data-manager...")
     print("GOOGLE_APPLICATION_CREDENTIALS =", os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
     vertexai.init(project=PROJECT_ID, location=GOOGLE_CLOUD_LOCATION)
+    warm_corpus_index()
+    start_import_runner()
     subscriber = pubsub_v1.SubscriberClient()
     subscription_path = subscriber.subscription_path(PROJECT_ID, SUBSCRIPTION_ID)
 
     print(f"Listening for messages on {subscription_path} ...")
 
-    future = subscriber.subscribe(subscription_path, callback=callback)
+    # Leased-but-unfinished messages are bounded here; imports beyond IMPORT_MAX_CONCURRENCY wait for a slot
+    flow_control = pubsub_v1.types.FlowControl(
+        max_messages=SUBSCRIBER_MAX_MESSAGES,
+        max_bytes=SUBSCRIBER_MAX_BYTES,
+        max_lease_duration=SUBSCRIBER_MAX_LEASE_SECONDS,
+    )
+    future = subscriber.subscribe(subscription_path, callback=callback, flow_control=flow_control)
     try:
         future.result()
     except KeyboardInterrupt:
         future.cancel()
+    finally:
+        stop_import_runner()
+        shutdown_extraction()
+        shutdown_publisher()
 
 if __name__ == "__main__":
     main()
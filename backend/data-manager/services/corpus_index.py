@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
+from vertexai.preview import rag
+from config import BUCKET_NAME, CORPUS_INDEX_BLOB
+
+storage_client = storage.Client()
+bucket = storage_client.bucket(BUCKET_NAME)
+
+# Local copy of the shared index: {display_name: corpus_id}
+_corpora = {}
+_generation = None
+_lock = threading.Lock()
+
+
+def _load():
+    """Reload the shared index if another replica changed it since we last read it."""
+    global _corpora, _generation
+    blob = bucket.get_blob(CORPUS_INDEX_BLOB)
+    if blob is None:
+        return False
+    if blob.generation != _generation:
+        try:
+            index = json.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+        except PreconditionFailed:
+            return _load()
+        _corpora = index.get("corpora", {})
+        _generation = blob.generation
+    return True
+
+
+def _record(entries: dict, max_attempts: int = 10) -> dict:
+    """
+    Merge {display_name: corpus_id} into the shared index (generation-conditional,
+    first writer wins per name) and return the index as stored.
+    """
+    global _corpora, _generation
+    for _ in range(max_attempts):
+        blob = bucket.get_blob(CORPUS_INDEX_BLOB)
+        generation = blob.generation if blob else 0
+        try:
+            index = json.loads(blob.download_as_bytes(if_generation_match=generation)) if blob else {}
+        except PreconditionFailed:
+            continue
+
+        corpora = index.setdefault("corpora", {})
+        if blob and all(corpora.get(name) for name in entries):
+            _corpora, _generation = corpora, generation
+            return corpora
+        for name, corpus_id in entries.items():
+            corpora.setdefault(name, corpus_id)
+        index["updated_at"] = time.time()
+
+        try:
+            written = bucket.blob(CORPUS_INDEX_BLOB)
+            written.upload_from_string(json.dumps(index), content_type="application/json", if_generation_match=generation)
+            _corpora, _generation = corpora, written.generation
+            return corpora
+        except PreconditionFailed:
+            continue
+
+    raise RuntimeError(f"Could not update corpus index {CORPUS_INDEX_BLOB} after {max_attempts} attempts")
+
+
+def warm_corpus_index():
+    """
+    Load the shared startup → corpus index at startup. The first replica ever to run
+    seeds it from a single full rag.list_corpora() listing; after that, every corpus
+    created by data-manager is added as it is created, so lookups never list again.
+    """
+    with _lock:
+        if _load():
+            print(f"🗂️ Loaded corpus index with {len(_corpora)} corpora")
+            return
+        seeded = {}
+        for corpus in rag.list_corpora():
+            seeded.setdefault(corpus.display_name, corpus.name)
+        _record(seeded)
+        print(f"🗂️ Seeded corpus index with {len(seeded)} corpora")
+
+
+def lookup_corpus(display_name: str):
+    """corpus_id for display_name, or None if no corpus has been created for it."""
+    corpus_id = _corpora.get(display_name)
+    if corpus_id:
+        return corpus_id
+    # Another replica may have created it since our last read
+    with _lock:
+        _load()
+        return _corpora.get(display_name)
+
+
+def register_corpus(display_name: str, corpus_id: str) -> str:
+    """Add a newly created corpus; returns the corpus_id the index settled on for display_name."""
+    with _lock:
+        return _record({display_name: corpus_id})[display_name]
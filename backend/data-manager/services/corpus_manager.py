@@ -1,45 +1,48 @@
 from vertexai.preview import rag
-
-STARTUP_TO_CORPUS_CACHE = {}
+from services.corpus_index import lookup_corpus, register_corpus
+from services.import_runner import import_slot
 
 def create_or_get_corpus(startup_name):
   """Creates a new corpus or retrieves an existing one."""
-  if startup_name in STARTUP_TO_CORPUS_CACHE:
-    return STARTUP_TO_CORPUS_CACHE[startup_name]
+  corpus_id = lookup_corpus(startup_name)
+  if corpus_id:
+    return corpus_id
   CORPUS_DISPLAY_NAME=startup_name
   embedding_model_config = rag.EmbeddingModelConfig(
       publisher_model="publishers/google/models/text-embedding-004"
   )
-  existing_corpora = rag.list_corpora()
-  corpus = None
-  for existing_corpus in existing_corpora:
-    if existing_corpus.display_name == CORPUS_DISPLAY_NAME:
-      corpus = existing_corpus
-      print(f"Found existing corpus with display name '{CORPUS_DISPLAY_NAME}'")
-      break
-  if corpus is None:
-    corpus = rag.create_corpus(
-        display_name=CORPUS_DISPLAY_NAME,
-        description=f"A corpus to store {CORPUS_DISPLAY_NAME} startup data",
-        embedding_model_config=embedding_model_config,
-    )
-    print(f"Created new corpus with display name '{CORPUS_DISPLAY_NAME}'")
-    STARTUP_TO_CORPUS_CACHE[startup_name] = corpus.name  # corpus.name is corpus_id
-  return corpus.name
+  corpus = rag.create_corpus(
+      display_name=CORPUS_DISPLAY_NAME,
+      description=f"A corpus to store {CORPUS_DISPLAY_NAME} startup data",
+      embedding_model_config=embedding_model_config,
+  )
+  print(f"Created new corpus with display name '{CORPUS_DISPLAY_NAME}'")
+  corpus_id = register_corpus(startup_name, corpus.name)  # corpus.name is corpus_id
+  if corpus_id != corpus.name:
+    # Another replica created one for this startup at the same time; keep theirs
+    print(f"Corpus for '{CORPUS_DISPLAY_NAME}' was created concurrently, deleting duplicate {corpus.name}")
+    rag.delete_corpus(name=corpus.name)
+  return corpus_id
 
-def upload_gcs_pdf_to_corpus(corpus_id, gcs_path, startup_name):
+async def upload_gcs_pdf_to_corpus(corpus_id, gcs_path, startup_name):
     #vertexai.init(project=PROJECT_ID, location=GOOGLE_CLOUD_LOCATION)
     
-    """Uploads a PDF file from GCS into a Vertex AI RAG corpus with metadata."""
+    """
+    Imports PDF files from GCS into a Vertex AI RAG corpus. Starts the long-running
+    import operation and awaits it without holding a thread while Vertex AI works.
+    """
     #print(f"📤 Uploading {display_name} ({gcs_path}) to corpus {corpus_name}...")
     
     try:
-        response = rag.import_files(
-            corpus_name=corpus_id,
-            paths=gcs_path,
-        )
+        async with import_slot():
+            operation = await rag.import_files_async(
+                corpus_name=corpus_id,
+                paths=gcs_path,
+            )
+            response = await operation.result()
         print(f"✅ Successfully imported files {gcs_path} to corpus for the startup {startup_name}")
         return response
     except Exception as e:
+        # The caller decides whether to retry or dead-letter the message
         print(f"Error importing files {gcs_path}: {e}")
-        return None
\ No newline at end of file
+        raise
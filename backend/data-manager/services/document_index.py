@@ -0,0 +1,51 @@
+import json
+import time
+from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
+from config import BUCKET_NAME
+
+DOCUMENT_INDEX_PREFIX = "doc_index"
+
+storage_client = storage.Client()
+bucket = storage_client.bucket(BUCKET_NAME)
+
+
+def record_imported_documents(startup_name: str, corpus_id: str, documents: list, max_attempts: int = 10):
+    """
+    Add successfully imported documents to the startup's content-hash index
+    (doc_index/<startup_name>.json), which the api-gateway reads to skip
+    re-uploading unchanged files. Writes are generation-conditional so
+    concurrent imports for the same startup merge instead of overwriting.
+    """
+    documents = [d for d in documents if d.get("sha256")]
+    if not documents:
+        return
+
+    blob_name = f"{DOCUMENT_INDEX_PREFIX}/{startup_name}.json"
+    for _ in range(max_attempts):
+        existing = bucket.get_blob(blob_name)
+        generation = existing.generation if existing else 0
+        try:
+            index = json.loads(existing.download_as_bytes(if_generation_match=generation)) if existing else {}
+        except PreconditionFailed:
+            continue
+
+        entries = index.setdefault("documents", {})
+        for doc in documents:
+            entries.setdefault(doc["sha256"], {
+                "gcs_path": doc["gcs_path"],
+                "name": doc.get("name"),
+                "corpus_id": corpus_id,
+                "imported_at": time.time(),
+            })
+
+        try:
+            bucket.blob(blob_name).upload_from_string(
+                json.dumps(index), content_type="application/json", if_generation_match=generation
+            )
+            print(f"🗂️ Indexed {len(documents)} document(s) for {startup_name}")
+            return
+        except PreconditionFailed:
+            continue
+
+    print(f"⚠️ Could not update document index {blob_name} after {max_attempts} attempts")
@@ -0,0 +1,190 @@
+import asyncio
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from google.cloud import storage
+from google.api_core.exceptions import NotFound
+from config import BUCKET_NAME, EXTRACTION_WORKERS, EXTRACTION_MAX_BYTES
+from services.import_runner import run_blocking
+
+EXTRACTED_DIR = "extracted"
+# Bump when the output format changes so old cache entries are parsed again
+EXTRACTOR_VERSION = 1
+
+storage_client = storage.Client()
+bucket = storage_client.bucket(BUCKET_NAME)
+
+# Parsing is CPU-bound, so it runs in worker processes; spawned, since this process runs threads
+_pool = None
+_slots = asyncio.Semaphore(EXTRACTION_WORKERS)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_extraction():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def run_in_pool(func, *args):
+    """Run a CPU-bound, picklable func(*args) on the parser processes."""
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), func, *args)
+
+
+def extraction_blob_name(startup_name: str, sha256: str) -> str:
+    return f"{startup_name}/{EXTRACTED_DIR}/{sha256}.json.gz"
+
+
+def _format(name: str):
+    extension = os.path.splitext(name or "")[1].lower()
+    return {".pdf": "pdf", ".pptx": "pptx", ".docx": "docx"}.get(extension)
+
+
+def _parse_pdf(data: bytes):
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    pages = [{"number": i, "text": page.extract_text() or ""} for i, page in enumerate(reader.pages, start=1)]
+    # pypdf has no table detection; tables stay part of the page text
+    return pages, []
+
+
+def _parse_pptx(data: bytes):
+    from pptx import Presentation
+
+    pages, tables = [], []
+    for number, slide in enumerate(Presentation(io.BytesIO(data)).slides, start=1):
+        texts = []
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                texts.append(shape.text_frame.text)
+            if getattr(shape, "has_table", False):
+                rows = [[cell.text for cell in row.cells] for row in shape.table.rows]
+                tables.append({"page": number, "rows": rows})
+        pages.append({"number": number, "text": "\n".join(t for t in texts if t)})
+    return pages, tables
+
+
+def _parse_docx(data: bytes):
+    import docx
+
+    document = docx.Document(io.BytesIO(data))
+    # DOCX has no fixed pages; last-rendered page breaks (saved by Word) and explicit
+    # page breaks mark the boundaries, to paragraph granularity
+    pages, lines = [], []
+
+    def end_page():
+        pages.append({"number": len(pages) + 1, "text": "\n".join(lines)})
+        lines.clear()
+
+    for paragraph in document.paragraphs:
+        if paragraph.contains_page_break and lines:
+            end_page()
+        if paragraph.text:
+            lines.append(paragraph.text)
+        if paragraph._element.xpath('.//w:br[@w:type="page"]'):
+            end_page()
+    if lines or not pages:
+        end_page()
+    tables = [
+        {"page": None, "rows": [[cell.text for cell in row.cells] for row in table.rows]}
+        for table in document.tables
+    ]
+    return pages, tables
+
+
+_PARSERS = {"pdf": _parse_pdf, "pptx": _parse_pptx, "docx": _parse_docx}
+
+
+def parse_document(data: bytes, name: str) -> dict:
+    """Text, tables and page boundaries of one document. Runs in a worker process."""
+    doc_format = _format(name)
+    pages, tables = _PARSERS[doc_format](data)
+    return {
+        "name": name,
+        "format": doc_format,
+        "extractor_version": EXTRACTOR_VERSION,
+        "pages": pages,
+        "tables": tables,
+    }
+
+
+def _cached(blob_name: str) -> bool:
+    blob = bucket.get_blob(blob_name)
+    return blob is not None and (blob.metadata or {}).get("extractor_version") == str(EXTRACTOR_VERSION)
+
+
+def _download(gcs_path: str):
+    """The document's bytes, or None if it is larger than EXTRACTION_MAX_BYTES."""
+    blob = bucket.get_blob(gcs_path.split(f"gs://{BUCKET_NAME}/", 1)[-1])
+    if blob is None:
+        raise NotFound(gcs_path)
+    if blob.size > EXTRACTION_MAX_BYTES:
+        return None
+    return blob.download_as_bytes()
+
+
+def _store(blob_name: str, extraction: dict):
+    blob = bucket.blob(blob_name)
+    blob.metadata = {"extractor_version": str(EXTRACTOR_VERSION)}
+    blob.upload_from_string(
+        gzip.compress(json.dumps(extraction, separators=(",", ":")).encode("utf-8")),
+        content_type="application/gzip",
+    )
+
+
+def load_extraction(startup_name: str, sha256: str):
+    """The cached extraction of a document, or None if it has not been extracted."""
+    try:
+        data = bucket.blob(extraction_blob_name(startup_name, sha256)).download_as_bytes()
+    except NotFound:
+        return None
+    return json.loads(gzip.decompress(data))
+
+
+async def _extract_document(startup_name: str, document: dict):
+    sha256, name = document.get("sha256"), document.get("name") or document.get("gcs_path")
+    if not sha256 or not _format(name):
+        return None
+    blob_name = extraction_blob_name(startup_name, sha256)
+    if await run_blocking(_cached, blob_name):
+        return blob_name
+
+    try:
+        # Only as many documents in memory as there are parsers to work on them
+        async with _slots:
+            data = await run_blocking(_download, document["gcs_path"])
+            if data is None:
+                print(f"⚠️ Skipping extraction of {name}: larger than EXTRACTION_MAX_BYTES")
+                return None
+            start = time.perf_counter()
+            extraction = await run_in_pool(parse_document, data, name)
+        extraction["sha256"] = sha256
+        await run_blocking(_store, blob_name, extraction)
+        print(f"📄 Extracted {len(extraction['pages'])} page(s) from {name} in {time.perf_counter() - start:.1f}s")
+        return blob_name
+    except Exception as e:
+        # Extraction is an extra local view of the documents; it never blocks the import
+        print(f"⚠️ Could not extract {name}: {e}")
+        return None
+
+
+async def extract_documents(startup_name: str, documents: list) -> dict:
+    """
+    Extract every PDF/PPTX/DOCX document into {startup}/extracted/<sha256>.json.gz, skipping
+    content that is already cached. Returns {sha256: cache blob name} for the documents
+    that have an extraction.
+    """
+    blob_names = await asyncio.gather(*(_extract_document(startup_name, d) for d in documents))
+    return {d["sha256"]: b for d, b in zip(documents, blob_names) if b}
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import IMPORT_MAX_CONCURRENCY
+
+# Imports run as coroutines on one background event loop, so a slow import holds
+# a semaphore slot instead of a subscriber callback thread
+_loop = None
+_thread = None
+_import_slots = None
+# Blocking helpers (corpus lookup, GCS index writes) run here, bounded alongside the imports
+_executor = ThreadPoolExecutor(max_workers=IMPORT_MAX_CONCURRENCY, thread_name_prefix="import")
+
+
+def start_import_runner():
+    global _loop, _thread, _import_slots
+    if _loop is not None:
+        return
+    _loop = asyncio.new_event_loop()
+    _import_slots = asyncio.Semaphore(IMPORT_MAX_CONCURRENCY)
+    _thread = threading.Thread(target=_loop.run_forever, name="import-loop", daemon=True)
+    _thread.start()
+
+
+def stop_import_runner():
+    global _loop, _thread
+    if _loop is None:
+        return
+    _loop.call_soon_threadsafe(_loop.stop)
+    _thread.join()
+    _executor.shutdown(wait=True)
+    _loop = _thread = None
+
+
+def submit(coro):
+    """Schedule coro on the import loop from any thread; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def import_slot():
+    """At most IMPORT_MAX_CONCURRENCY import operations are in flight at once."""
+    return _import_slots
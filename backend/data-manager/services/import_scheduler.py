@@ -0,0 +1,70 @@
+import asyncio
+from config import IMPORT_COALESCE_WINDOW_SECONDS, IMPORT_COALESCE_MAX_PATHS
+from services.corpus_manager import upload_gcs_pdf_to_corpus
+
+# corpus_id -> [(gcs_path list, future)] waiting for that corpus's next import.
+# Only touched from the import loop, so no locking is needed.
+_pending = {}
+# corpus_id -> the task draining _pending for that corpus; one per corpus, so imports never overlap
+_drainers = {}
+
+
+def _take_batch(corpus_id):
+    """Pop waiting requests whose paths, together, fit in one import_files call."""
+    queue = _pending[corpus_id]
+    batch, paths = [], []
+    while queue:
+        request_paths, future = queue[0]
+        new = [p for p in request_paths if p not in paths]
+        if batch and len(paths) + len(new) > IMPORT_COALESCE_MAX_PATHS:
+            break
+        queue.pop(0)
+        batch.append(future)
+        paths.extend(new)
+    return batch, paths
+
+
+async def _drain(corpus_id, startup_name):
+    try:
+        while _pending.get(corpus_id):
+            # Let requests arriving close together join this import
+            await asyncio.sleep(IMPORT_COALESCE_WINDOW_SECONDS)
+            batch, paths = _take_batch(corpus_id)
+            if len(batch) > 1:
+                print(f"🧺 Coalesced {len(batch)} imports ({len(paths)} files) into corpus {corpus_id}")
+            try:
+                response = await upload_gcs_pdf_to_corpus(corpus_id=corpus_id, gcs_path=paths, startup_name=startup_name)
+            except Exception as e:
+                for future in batch:
+                    future.set_exception(e)
+                continue
+            for future in batch:
+                future.set_result(response)
+    finally:
+        del _drainers[corpus_id]
+        for _, future in _pending.pop(corpus_id, []):
+            future.cancel()
+
+
+async def import_to_corpus(corpus_id, gcs_path, startup_name):
+    """
+    Import gcs_path into corpus_id, sharing one import_files call with any other
+    requests for the same corpus that arrive within IMPORT_COALESCE_WINDOW_SECONDS.
+    Imports into one corpus run one at a time. A request with more than
+    IMPORT_COALESCE_MAX_PATHS paths is split into parts that each fit one call, and
+    resolves once all of its parts have. Returns the shared import response (a part's
+    response with failed files, if any), or raises the first part's import error.
+    """
+    paths = list(dict.fromkeys(gcs_path))
+    parts = [paths[i:i + IMPORT_COALESCE_MAX_PATHS] for i in range(0, len(paths), IMPORT_COALESCE_MAX_PATHS)] or [paths]
+    loop = asyncio.get_running_loop()
+    futures = [loop.create_future() for _ in parts]
+    _pending.setdefault(corpus_id, []).extend(zip(parts, futures))
+    if corpus_id not in _drainers:
+        _drainers[corpus_id] = asyncio.create_task(_drain(corpus_id, startup_name))
+
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return next((r for r in results if getattr(r, "failed_rag_files_count", 0)), results[-1])
@@ -0,0 +1,81 @@
+import json
+import time
+from google.cloud import storage
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from config import BUCKET_NAME, LEDGER_PREFIX, LEDGER_TTL_SECONDS, LEDGER_LEASE_SECONDS
+
+storage_client = storage.Client()
+bucket = storage_client.bucket(BUCKET_NAME)
+
+CLAIMED = "claimed"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+RETRYING = "retrying"
+DEAD_LETTERED = "dead_lettered"
+
+
+def _blob_name(upload_id: str, stage: str) -> str:
+    return f"{LEDGER_PREFIX}/{upload_id}/{stage}.json"
+
+
+def claim(upload_id: str, stage: str, max_attempts: int = 10):
+    """
+    Take ownership of (upload_id, stage). Returns (state, entry):
+    CLAIMED when the caller should do the work, COMPLETED with the entry stored by
+    complete(), IN_PROGRESS while another consumer holds an unexpired lease, RETRYING
+    during a retry's backoff, or DEAD_LETTERED once the stage has been given up.
+    Expired entries (a crashed holder, a retry whose backoff has passed, or a completed
+    stage past its TTL) are taken over; the claim keeps their count of failed attempts.
+    """
+    blob_name = _blob_name(upload_id, stage)
+    for _ in range(max_attempts):
+        now = time.time()
+        attempts = 0
+        blob = bucket.get_blob(blob_name)
+        if blob is not None:
+            try:
+                entry = json.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+            except (NotFound, PreconditionFailed):
+                continue
+            if entry.get("expires_at", 0) > now:
+                return entry.get("status"), entry
+            attempts = entry.get("attempts", 0)
+
+        entry = {"status": IN_PROGRESS, "expires_at": now + LEDGER_LEASE_SECONDS, "attempts": attempts}
+        try:
+            # generation 0 only creates; otherwise replace exactly the expired entry we read
+            bucket.blob(blob_name).upload_from_string(
+                json.dumps(entry), content_type="application/json",
+                if_generation_match=blob.generation if blob else 0,
+            )
+            return CLAIMED, entry
+        except PreconditionFailed:
+            continue
+    return IN_PROGRESS, None
+
+
+def complete(upload_id: str, stage: str, **result) -> dict:
+    """Mark the stage done for LEDGER_TTL_SECONDS, keeping result for duplicate deliveries."""
+    entry = dict(result, status=COMPLETED, expires_at=time.time() + LEDGER_TTL_SECONDS)
+    bucket.blob(_blob_name(upload_id, stage)).upload_from_string(json.dumps(entry), content_type="application/json")
+    return entry
+
+
+def get(upload_id: str, stage: str):
+    """The stored entry for (upload_id, stage), or None."""
+    blob = bucket.get_blob(_blob_name(upload_id, stage))
+    return json.loads(blob.download_as_bytes()) if blob else None
+
+
+def defer(upload_id: str, stage: str, retry_at: float, **info) -> dict:
+    """Hold the stage for a scheduled retry; the next claim after retry_at takes it over."""
+    entry = dict(info, status=RETRYING, expires_at=retry_at)
+    bucket.blob(_blob_name(upload_id, stage)).upload_from_string(json.dumps(entry), content_type="application/json")
+    return entry
+
+
+def park(upload_id: str, stage: str, **info) -> dict:
+    """Record that the stage was given up and dead-lettered; duplicates are dropped for the TTL."""
+    entry = dict(info, status=DEAD_LETTERED, expires_at=time.time() + LEDGER_TTL_SECONDS)
+    bucket.blob(_blob_name(upload_id, stage)).upload_from_string(json.dumps(entry), content_type="application/json")
+    return entry
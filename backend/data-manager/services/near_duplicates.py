@@ -0,0 +1,181 @@
+import base64
+import gzip
+import json
+import random
+import re
+from array import array
+from collections import defaultdict
+from hashlib import blake2b
+from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
+from config import (
+    BUCKET_NAME, DEDUP_SIMILARITY_THRESHOLD, DEDUP_NUM_PERM, DEDUP_LSH_BANDS,
+    DEDUP_SHINGLE_WORDS, DEDUP_MIN_WORDS,
+)
+from services.extraction import EXTRACTED_DIR, load_extraction, run_in_pool
+from services.import_runner import run_blocking
+
+DEDUPED_DIR = "deduped"
+
+storage_client = storage.Client()
+bucket = storage_client.bucket(BUCKET_NAME)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures are stored and compared across processes and restarts
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(DEDUP_NUM_PERM)
+]
+
+
+def _signature(text: str):
+    """MinHash of the page's word shingles, or None for pages too short to compare."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < DEDUP_MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + DEDUP_SHINGLE_WORDS]) for i in range(len(words) - DEDUP_SHINGLE_WORDS + 1)}
+    hashes = [int.from_bytes(blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles]
+    return array("I", (min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS))
+
+
+def page_signatures(texts: list) -> list:
+    """Signatures of many pages as bytes (None for short pages). Runs in a worker process."""
+    signatures = [_signature(text) for text in texts]
+    return [s.tobytes() if s is not None else None for s in signatures]
+
+
+class _LSHIndex:
+    """Banded LSH over MinHash signatures; candidates are confirmed by estimated Jaccard similarity."""
+
+    def __init__(self):
+        self.rows = DEDUP_NUM_PERM // DEDUP_LSH_BANDS
+        self.buckets = [defaultdict(list) for _ in range(DEDUP_LSH_BANDS)]
+        self.signatures = {}
+
+    def _bands(self, signature):
+        return [bytes(signature[i * self.rows:(i + 1) * self.rows]) for i in range(DEDUP_LSH_BANDS)]
+
+    def add(self, key: str, signature: array):
+        self.signatures[key] = signature
+        for band, band_bucket in zip(self._bands(signature), self.buckets):
+            band_bucket[band].append(key)
+
+    def match(self, signature: array):
+        """Key of an indexed page at least DEDUP_SIMILARITY_THRESHOLD similar, or None."""
+        candidates = set()
+        for band, band_bucket in zip(self._bands(signature), self.buckets):
+            candidates.update(band_bucket.get(band, ()))
+        for key in candidates:
+            other = self.signatures[key]
+            similarity = sum(x == y for x, y in zip(signature, other)) / DEDUP_NUM_PERM
+            if similarity >= DEDUP_SIMILARITY_THRESHOLD:
+                return key
+        return None
+
+
+def _index_blob_name(startup_name: str) -> str:
+    return f"{startup_name}/{EXTRACTED_DIR}/page_signatures.json.gz"
+
+
+def _from_bytes(data: bytes) -> array:
+    signature = array("I")
+    signature.frombytes(data)
+    return signature
+
+
+def _load_index(startup_name: str) -> _LSHIndex:
+    """Signatures of every page already imported into the startup's corpus."""
+    index = _LSHIndex()
+    blob = bucket.get_blob(_index_blob_name(startup_name))
+    if blob is None:
+        return index
+    stored = json.loads(gzip.decompress(blob.download_as_bytes()))
+    if stored.get("num_perm") == DEDUP_NUM_PERM:
+        for key, encoded in stored.get("pages", {}).items():
+            index.add(key, _from_bytes(base64.b64decode(encoded)))
+    return index
+
+
+def record_page_signatures(startup_name: str, signatures: dict, max_attempts: int = 10):
+    """Merge {page key: signature bytes} of newly imported pages into the startup's page index."""
+    if not signatures:
+        return
+    blob_name = _index_blob_name(startup_name)
+    for _ in range(max_attempts):
+        existing = bucket.get_blob(blob_name)
+        generation = existing.generation if existing else 0
+        try:
+            stored = json.loads(gzip.decompress(existing.download_as_bytes(if_generation_match=generation))) if existing else {}
+        except PreconditionFailed:
+            continue
+        if stored.get("num_perm") != DEDUP_NUM_PERM:
+            stored = {"num_perm": DEDUP_NUM_PERM, "pages": {}}
+        stored["pages"].update({key: base64.b64encode(sig).decode("ascii") for key, sig in signatures.items()})
+        try:
+            bucket.blob(blob_name).upload_from_string(
+                gzip.compress(json.dumps(stored, separators=(",", ":")).encode("utf-8")),
+                content_type="application/gzip",
+                if_generation_match=generation,
+            )
+            return
+        except PreconditionFailed:
+            continue
+    print(f"⚠️ Could not update page signature index {blob_name} after {max_attempts} attempts")
+
+
+def _write_distinct_pages(startup_name: str, sha256: str, name: str, pages: list) -> str:
+    blob_name = f"{startup_name}/{DEDUPED_DIR}/{sha256}.txt"
+    text = "\n\n".join(f"[{name}, page {page['number']}]\n{page['text']}" for page in pages)
+    bucket.blob(blob_name).upload_from_string(text, content_type="text/plain")
+    return f"gs://{BUCKET_NAME}/{blob_name}"
+
+
+async def plan_import(startup_name: str, gcs_path: list, documents: list):
+    """
+    Decide what to import for new documents, comparing their extracted pages against
+    pages already in the corpus and against each other (e.g. the same deck as PDF and PPTX):
+
+    - no near-duplicate pages: the original file is imported
+    - some near-duplicate pages: a text file with only the distinct pages is imported instead
+    - only near-duplicate pages: the document is dropped
+
+    Returns (paths to import, {page key: signature} of the imported pages, to be passed
+    to record_page_signatures() once the import succeeded). Documents without an
+    extraction are imported unchanged.
+    """
+    index = await run_blocking(_load_index, startup_name)
+    by_path = {d["gcs_path"]: d for d in documents if d.get("sha256")}
+    paths, new_signatures = [], {}
+
+    for path in gcs_path:
+        document = by_path.get(path)
+        extraction = await run_blocking(load_extraction, startup_name, document["sha256"]) if document else None
+        if not extraction or not extraction.get("pages"):
+            paths.append(path)
+            continue
+
+        pages = extraction["pages"]
+        signatures = await run_in_pool(page_signatures, [page["text"] for page in pages])
+        distinct, duplicates = [], 0
+        for page, encoded in zip(pages, signatures):
+            # Pages too short to compare (title slides, blank pages) are always kept
+            if encoded is not None:
+                signature = _from_bytes(encoded)
+                if index.match(signature):
+                    duplicates += 1
+                    continue
+                key = f"{document['sha256']}:{page['number']}"
+                index.add(key, signature)
+                new_signatures[key] = encoded
+            distinct.append(page)
+
+        name = document.get("name") or path
+        if not duplicates:
+            paths.append(path)
+        elif not distinct:
+            print(f"✂️ Dropping {name}: all {len(pages)} page(s) are near-duplicates of existing content")
+        else:
+            print(f"✂️ Importing {len(distinct)}/{len(pages)} distinct page(s) of {name}")
+            paths.append(await run_blocking(_write_distinct_pages, startup_name, document["sha256"], name, distinct))
+    return paths, new_signatures
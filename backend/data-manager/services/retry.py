@@ -0,0 +1,81 @@
+import random
+import time
+import traceback
+from google.api_core import exceptions as api_exceptions
+from config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_QUOTA_BASE_SECONDS, RETRY_MAX_DELAY_SECONDS,
+    DEAD_LETTER_TOPIC_ID,
+)
+from services.pubsub_utils import publish_message
+
+TRANSIENT = "transient"
+QUOTA = "quota"
+PERMANENT = "permanent"
+
+_QUOTA_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+_TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable, api_exceptions.DeadlineExceeded, api_exceptions.InternalServerError,
+    api_exceptions.Aborted, api_exceptions.BadGateway, api_exceptions.GatewayTimeout,
+    ConnectionError, TimeoutError,
+)
+# Bad input (malformed message, unreadable or missing document, no access): retrying cannot help
+_PERMANENT_ERRORS = (
+    api_exceptions.InvalidArgument, api_exceptions.NotFound, api_exceptions.PermissionDenied,
+    api_exceptions.Unauthenticated, api_exceptions.FailedPrecondition,
+    ValueError, KeyError, TypeError,
+)
+
+# Pub/Sub accepts ack deadlines between 10 and 600 seconds
+_MIN_DELAY_SECONDS = 10
+_MAX_DELAY_SECONDS = 600
+
+
+def classify(error: Exception) -> str:
+    if isinstance(error, _QUOTA_ERRORS):
+        return QUOTA
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return TRANSIENT
+    if isinstance(error, _PERMANENT_ERRORS):
+        return PERMANENT
+    # Unknown failures get the benefit of the doubt, bounded by RETRY_MAX_ATTEMPTS
+    return TRANSIENT
+
+
+def should_retry(classification: str, attempts: int) -> bool:
+    return classification != PERMANENT and attempts < RETRY_MAX_ATTEMPTS
+
+
+def backoff_seconds(classification: str, attempts: int) -> int:
+    """
+    Exponential backoff with jitter for the attempts-th failure: half of the delay is
+    fixed and half random, so retries of many failed uploads spread out.
+    """
+    base = RETRY_QUOTA_BASE_SECONDS if classification == QUOTA else RETRY_BASE_SECONDS
+    delay = min(RETRY_MAX_DELAY_SECONDS, base * 2 ** (attempts - 1))
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    return int(max(_MIN_DELAY_SECONDS, min(_MAX_DELAY_SECONDS, delay)))
+
+
+def retry_later(message, delay: float):
+    """
+    Have Pub/Sub redeliver message after delay seconds (clamped to 10-600). Dropping it from
+    lease management frees its flow-control slot, so waiting retries never hold back other startups.
+    """
+    message.modify_ack_deadline(int(max(_MIN_DELAY_SECONDS, min(_MAX_DELAY_SECONDS, delay))))
+    message.drop()
+
+
+def dead_letter(payload, error: Exception, classification: str, attempts: int, on_done=None):
+    """Park a message that will not be retried on the dead-letter topic, with a diagnostic record."""
+    record = {
+        "payload": payload,
+        "upload_id": payload.get("upload_id") if isinstance(payload, dict) else None,
+        "startup_name": payload.get("startup_name") if isinstance(payload, dict) else None,
+        "classification": classification,
+        "attempts": attempts,
+        "error_type": type(error).__name__,
+        "error": str(error),
+        "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__))[-4000:],
+        "failed_at": time.time(),
+    }
+    return publish_message(DEAD_LETTER_TOPIC_ID, record, on_done=on_done)
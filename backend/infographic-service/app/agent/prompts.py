@@ -27,4 +27,15 @@ def return_instructions_root() -> str:
         Follow the json strcture suggested by user
         """
 
-    return instruction_prompt_v0
\ No newline at end of file
+    return instruction_prompt_v0
+
+
+def return_instructions_keyword_lookup() -> str:
+    instruction_prompt_v0 = """
+        You look up exact figures, amounts and names in the startup's uploaded documents,
+        such as revenue, ARR, valuation, round size, burn or CAC/LTV, using the keyword
+        lookup tool. Search with the specific terms and figures in the question, report the
+        matching values exactly as written along with their source document and page, and
+        say so if nothing matches.
+        """
+    return instruction_prompt_v0
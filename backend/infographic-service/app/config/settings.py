@@ -23,6 +23,35 @@ class ServiceConfig:
     model_name: str = "gemini-2.5-flash"
 
 
+@dataclass
+class PubSubConfig:
+    batch_max_messages: int = 100
+    batch_max_bytes: int = 1024 * 1024
+    batch_max_latency: float = 0.01
+
+
+@dataclass
+class LedgerConfig:
+    prefix: str = "ledger"
+    ttl_seconds: int = 7 * 24 * 3600
+    lease_seconds: int = 3600
+
+
+@dataclass
+class RetrievalConfig:
+    backend: str = "vertex"  # "vertex" (RAG corpus) or "local" (memory-mapped index of extracted text)
+    embedder: str = "vertex"  # see retrieval.embedders; "hashing" needs no network
+    embedding_model: str = "text-embedding-004"
+    index_dir: str = "/tmp/vector_index"
+    top_k: int = 10
+    min_similarity: float = 0.4  # matches the RAG tool's vector_distance_threshold of 0.6
+    chunk_words: int = 200
+    chunk_overlap: int = 40
+    keyword_lookup: bool = True  # BM25 tool over the extracted text, alongside either backend
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+
+
 @dataclass
 class AgentConfig:
     app_name: str = "startup_analysis_agent"
@@ -50,6 +79,32 @@ class Settings:
             model_name=os.getenv("MODEL_NAME", "gemini-2.5-flash"),
         )
         
+        self.pubsub = PubSubConfig(
+            batch_max_messages=int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", "100")),
+            batch_max_bytes=int(os.getenv("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024))),
+            batch_max_latency=float(os.getenv("PUBSUB_BATCH_MAX_LATENCY", "0.01")),
+        )
+
+        self.ledger = LedgerConfig(
+            prefix=os.getenv("LEDGER_PREFIX", "ledger"),
+            ttl_seconds=int(os.getenv("LEDGER_TTL_SECONDS", str(7 * 24 * 3600))),
+            lease_seconds=int(os.getenv("LEDGER_LEASE_SECONDS", "3600")),
+        )
+
+        self.retrieval = RetrievalConfig(
+            backend=os.getenv("RETRIEVAL_BACKEND", "vertex"),
+            embedder=os.getenv("RETRIEVAL_EMBEDDER", "vertex"),
+            embedding_model=os.getenv("RETRIEVAL_EMBEDDING_MODEL", "text-embedding-004"),
+            index_dir=os.getenv("RETRIEVAL_INDEX_DIR", "/tmp/vector_index"),
+            top_k=int(os.getenv("RETRIEVAL_TOP_K", "10")),
+            min_similarity=float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.4")),
+            chunk_words=int(os.getenv("RETRIEVAL_CHUNK_WORDS", "200")),
+            chunk_overlap=int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "40")),
+            keyword_lookup=os.getenv("RETRIEVAL_KEYWORD_LOOKUP", "true").lower() == "true",
+            bm25_k1=float(os.getenv("RETRIEVAL_BM25_K1", "1.5")),
+            bm25_b=float(os.getenv("RETRIEVAL_BM25_B", "0.75")),
+        )
+
         self.agent = AgentConfig(
             app_name=os.getenv("AGENT_APP_NAME", "startup_analysis_agent"),
             user_id=os.getenv("AGENT_USER_ID", "analysis_service"),
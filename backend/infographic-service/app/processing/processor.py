@@ -4,7 +4,7 @@ import asyncio
 import re
 import json
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable
 
 from ..agent.agent import create_infographic_agents, AgentRunner
 from ..config.settings import settings
@@ -24,8 +24,15 @@ class InfographicProcessor:
         )
         self.image_generator = ImageGenerator()
 
-    async def process_infographic_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process infographic request with sections processed sequentially"""
+    async def process_infographic_request(
+        self,
+        request_data: Dict[str, Any],
+        on_section_done: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Process infographic request with sections processed sequentially.
+
+        on_section_done, if given, is called with each section name as it finishes.
+        """
         request_id = str(uuid.uuid4())
         start_time = datetime.utcnow()
         
@@ -55,6 +62,12 @@ class InfographicProcessor:
                     logger.error(f"Error processing section {section['name']}: {str(e)}")
                     results[section['name']] = {"error": str(e)}
 
+                if on_section_done:
+                    try:
+                        on_section_done(section['name'])
+                    except Exception as e:
+                        logger.warning(f"Progress callback failed for section {section['name']}: {str(e)}")
+
             end_time = datetime.utcnow()
             processing_time = (end_time - start_time).total_seconds()
             
@@ -90,7 +103,9 @@ class InfographicProcessor:
             logger.error(f"Failed to process infographic request {request_id}: {str(e)}")
             return {
                 "request_id": request_id,
+                "service_name": "infographic-service",
                 "startup_name": request_data.get('startup_name', 'unknown'),
+                "upload_id": request_data.get('upload_id'),
                 "status": "error",
                 "timestamp": datetime.utcnow().isoformat(),
                 "error": str(e)
@@ -182,7 +197,7 @@ class InfographicProcessor:
         try:
             logger.info(f"Processing section: {section_name} for {startup_name}")
     
-            agent = create_infographic_agents(rag_corpus, settings.service.model_name)
+            agent = create_infographic_agents(rag_corpus, settings.service.model_name, startup_name)
     
             result = await self.agent_runner.call_agent_async(prompt, agent)
     
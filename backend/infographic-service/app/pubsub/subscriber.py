@@ -12,10 +12,14 @@ from google.cloud.pubsub_v1.subscriber.message import Message
 
 from ..config.settings import settings
 from ..processing.processor import InfographicProcessor
-from ..pubsub.publisher import PubSubPublisher
+from ..pubsub.publisher import get_publisher, flush_publisher
+from ..utils.manifest import ManifestWriter
+from ..utils.ledger import StageLedger, CLAIMED
 
 logger = logging.getLogger(__name__)
 
+LEDGER_STAGE = "infographic"
+
 
 class PubSubSubscriber:
     def __init__(self):
@@ -24,7 +28,8 @@ class PubSubSubscriber:
             settings.gcp.project_id, settings.gcp.subscription_name
         )
         self.processor = InfographicProcessor()
-        self.publisher = PubSubPublisher()
+        self.publisher = get_publisher()
+        self.ledger = self._ledger()
 
     def start_listening(self):
         logger.info(f"Starting to listen on subscription: {self.subscription_path}")
@@ -64,6 +69,13 @@ class PubSubSubscriber:
                 message.ack()
                 return
             
+            # Skip uploads this service has finished, or that another worker is processing right now
+            state, _ = self.ledger.claim(data['upload_id'], LEDGER_STAGE)
+            if state != CLAIMED:
+                logger.info(f"Skipping duplicate request for upload {data['upload_id']} ({state})")
+                message.ack()
+                return
+
             # Start a new process for this message
             process = multiprocessing.Process(
                 target=self._process_message_in_subprocess,
@@ -92,26 +104,40 @@ class PubSubSubscriber:
         try:
             logger.info(f"🔄 Starting processing in subprocess for message: {message_id}")
             
-            # Create processor and publisher instances in subprocess
+            # Create processor and publisher instances in subprocess (the topic was checked at service startup)
             processor = InfographicProcessor()
-            publisher = PubSubPublisher()
+            publisher = get_publisher(ensure_topic=False)
             
             # Create new event loop for this process
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             
             try:
+                def on_section_done(section_name: str) -> None:
+                    publisher.publish_progress({
+                        "service_name": "infographic-service",
+                        "startup_name": data.get('startup_name'),
+                        "upload_id": data.get('upload_id'),
+                        "section": section_name,
+                    })
+
                 # Run the async processing
-                result = loop.run_until_complete(processor.process_infographic_request(data))
-                
+                result = loop.run_until_complete(
+                    processor.process_infographic_request(data, on_section_done=on_section_done)
+                )
+
+                PubSubSubscriber._record_manifest(data, result)
+
                 # Publish result
                 if result.get('status') == 'completed':
+                    PubSubSubscriber._finish_stage(data, completed=True)
                     success = publisher.publish_result(result)
                     if success:
                         logger.info(f"📤 Successfully published result for: {result.get('startup_name')}")
                     else:
                         logger.error(f"Failed to publish result for: {result.get('startup_name')}")
                 else:
+                    PubSubSubscriber._finish_stage(data, completed=False)
                     publisher.publish_error(result)
                     logger.error(f"Infographic failed for: {result.get('startup_name')}")
                     
@@ -121,10 +147,14 @@ class PubSubSubscriber:
                 
         except Exception as e:
             logger.error(f"Error in subprocess processing for message {message_id}: {str(e)}")
+            PubSubSubscriber._record_manifest(data, {"error": str(e)})
+            PubSubSubscriber._finish_stage(data, completed=False)
             try:
-                publisher = PubSubPublisher()
+                publisher = get_publisher(ensure_topic=False)
                 error_data = {
                     "startup_name": data.get('startup_name', 'unknown'),
+                    "upload_id": data.get('upload_id'),
+                    "service_name": "infographic-service",
                     "error": str(e),
                     "timestamp": None,
                     "request_id": None
@@ -133,9 +163,48 @@ class PubSubSubscriber:
             except Exception as pub_error:
                 logger.error(f"Failed to publish error: {str(pub_error)}")
         finally:
+            # Deliver any batched progress events before the process goes away
+            flush_publisher()
             logger.info(f"Subprocess completed for message: {message_id}")
             sys.exit(0)
 
+    @staticmethod
+    def _ledger() -> StageLedger:
+        return StageLedger(
+            settings.gcp.bucket_name,
+            settings.ledger.prefix,
+            settings.ledger.ttl_seconds,
+            settings.ledger.lease_seconds,
+        )
+
+    @staticmethod
+    def _finish_stage(data: Dict[str, Any], completed: bool) -> None:
+        """Mark this upload's stage done in the ledger, or release it so a new request can retry"""
+        try:
+            ledger = PubSubSubscriber._ledger()
+            if completed:
+                ledger.complete(data.get('upload_id'), LEDGER_STAGE)
+            else:
+                ledger.release(data.get('upload_id'), LEDGER_STAGE)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Failed to update ledger: {str(e)}")
+
+    @staticmethod
+    def _record_manifest(data: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Record this service's artifacts (or failure) in the upload's completion manifest"""
+        try:
+            image_urls = (result.get('pdf_url') or {}).get('image_urls')
+            entry = {
+                "status": "completed" if image_urls else "failed",
+                "image_urls": image_urls,
+                "error": result.get('pdf_error') or result.get('error'),
+            }
+            ManifestWriter(settings.gcp.bucket_name).record(
+                data.get('upload_id'), data.get('startup_name'), "infographic", entry
+            )
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Failed to write completion manifest: {str(e)}")
+
     def _validate_message(self, data: Dict[str, Any]) -> bool:
         """Validate that message contains required fields"""
         required_fields = ['rag_corpus', 'startup_name', 'upload_id']
@@ -0,0 +1,102 @@
+import logging
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from google.cloud import storage
+
+from ..config.settings import settings
+from .chunks import list_extractions, load_chunks
+
+logger = logging.getLogger(__name__)
+
+# Currency symbols, numbers (with thousands separators, decimals, %) and words are separate
+# tokens, so "₹12.5 Cr" matches "₹ 12.5 crore"-style spellings on "₹", "12.5" and "cr"
+_TOKEN_RE = re.compile(r"[₹$€£¥]|\d+(?:[.,]\d+)*%?|[^\W\d_]+")
+_UNITS = {"crore": "cr", "crores": "cr", "lakh": "lakhs", "lac": "lakhs", "lacs": "lakhs",
+          "million": "mn", "mm": "mn", "billion": "bn", "thousand": "k"}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token[0].isdigit():
+            token = token.replace(",", "")
+        tokens.append(_UNITS.get(token, token))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 keyword index over one startup's document chunks.
+
+    Complements the vector index for exact figures and names ("₹12 Cr", "ARR", a
+    competitor), which embeddings tend to blur. The per-posting BM25 weight depends
+    only on the chunk, so it is computed once at build time; a query is a few array
+    additions, one per query term.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        frequencies: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        for doc, chunk in enumerate(chunks):
+            tokens = tokenize(chunk["text"])
+            lengths[doc] = len(tokens)
+            for token in tokens:
+                frequencies[token][doc] = frequencies[token].get(doc, 0) + 1
+
+        avg_length = float(lengths.mean()) if len(chunks) else 0.0
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, docs in frequencies.items():
+            ids = np.fromiter(docs.keys(), dtype=np.int32, count=len(docs))
+            tf = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            idf = math.log(1 + (len(chunks) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[ids] / avg_length)
+            self.postings[term] = (ids, (idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """The top_k chunks by BM25 score, best first; chunks matching no query term are left out"""
+        terms = {t for t in tokenize(query) if t in self.postings}
+        if not terms:
+            return []
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in terms:
+            ids, weights = self.postings[term]
+            scores[ids] += weights
+
+        matches = np.flatnonzero(scores)
+        k = min(top_k, len(matches))
+        top = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "text": self.chunks[i]["text"],
+                "source": self.chunks[i]["source"],
+                "page": self.chunks[i]["page"],
+                "score": round(float(scores[i]), 4),
+            }
+            for i in top
+        ]
+
+
+# One index per startup per process; a worker process handles a single request
+_indexes: Dict[str, BM25Index] = {}
+
+
+def get_keyword_index(startup_name: str) -> BM25Index:
+    if startup_name not in _indexes:
+        bucket = storage.Client().bucket(settings.gcp.bucket_name)
+        chunks = load_chunks(
+            bucket,
+            list_extractions(bucket, startup_name),
+            settings.retrieval.chunk_words,
+            settings.retrieval.chunk_overlap,
+        )
+        _indexes[startup_name] = BM25Index(chunks, k1=settings.retrieval.bm25_k1, b=settings.retrieval.bm25_b)
+        logger.info(f"Keyword index for {startup_name}: {len(chunks)} chunks, {len(_indexes[startup_name].postings)} terms")
+    return _indexes[startup_name]
@@ -0,0 +1,217 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from google.cloud import storage
+from google.api_core.exceptions import NotFound
+
+from ..config.settings import settings
+from .chunks import list_extractions, load_chunks
+from .embedders import Embedder, get_embedder
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = "vector_index"
+
+
+class LocalVectorIndex:
+    """Chunk embeddings of one startup's documents in a memory-mapped float32 matrix.
+
+    Chunks come from the text data-manager extracted; top-k queries are a single
+    matrix-vector product over normalised vectors (cosine similarity). Embeddings are
+    reused by chunk content hash, so re-uploaded or unchanged text is never embedded
+    again. The index files are mirrored to {startup}/vector_index/<embedder>/ in the
+    bucket so that other workers start warm.
+
+    Each rebuild writes its vectors to a new vectors-<generation>.f32 and then replaces
+    chunks.json, which names that file; chunks.json is always written last (locally and
+    in the bucket), so a reader never pairs it with another rebuild's vectors. Worker
+    processes on one host share the local files and rebuild them under a file lock.
+    """
+
+    def __init__(self, startup_name: str, embedder: Embedder, bucket_name: str, local_dir: str,
+                 chunk_words: int = 200, chunk_overlap: int = 40):
+        self.startup_name = startup_name
+        self.embedder = embedder
+        self.storage_client = storage.Client()
+        self.bucket = self.storage_client.bucket(bucket_name)
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+
+        slug = re.sub(r"[^\w.-]", "_", embedder.name)
+        self.local_dir = os.path.join(local_dir, startup_name, slug)
+        self.remote_prefix = f"{startup_name}/{INDEX_DIR}/{slug}"
+        self.sources: Dict[str, int] = {}
+        self.chunks: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.vectors_file: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.local_dir, filename)
+
+    def _remove(self, filename: str) -> None:
+        try:
+            os.remove(self._path(filename))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def _locked(self):
+        """Serialise loading and rebuilding the local files across worker processes"""
+        os.makedirs(self.local_dir, exist_ok=True)
+        with open(self._path("index.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_local(self) -> Optional[Dict[str, Any]]:
+        """chunks.json, if present and the vectors file it names holds exactly one row per chunk"""
+        try:
+            with open(self._path("chunks.json")) as f:
+                stored = json.load(f)
+            size = os.path.getsize(self._path(stored["vectors"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        if size != len(stored["chunks"]) * self.embedder.dim * np.dtype(np.float32).itemsize:
+            logger.warning(f"Vector index for {self.startup_name} does not match its chunks, rebuilding")
+            return None
+        return stored
+
+    def _load_local(self) -> None:
+        stored = self._read_local()
+        if stored is None:
+            self.sources, self.chunks, self.vectors_file = {}, [], None
+            self.vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            return
+        self.sources = stored["sources"]
+        self.chunks = stored["chunks"]
+        self.vectors_file = stored["vectors"]
+        if self.chunks:
+            self.vectors = np.memmap(
+                self._path(self.vectors_file), dtype=np.float32, mode="r", shape=(len(self.chunks), self.embedder.dim)
+            )
+        else:
+            self.vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+    def _download(self) -> None:
+        # chunks.json first: the vectors file it names is uploaded before it and never overwritten
+        tmp = f"chunks.json.{uuid.uuid4().hex}.tmp"
+        vectors_file = None
+        try:
+            self.bucket.blob(f"{self.remote_prefix}/chunks.json").download_to_filename(self._path(tmp))
+            with open(self._path(tmp)) as f:
+                vectors_file = json.load(f)["vectors"]
+            self.bucket.blob(f"{self.remote_prefix}/{vectors_file}").download_to_filename(self._path(vectors_file))
+        except (NotFound, ValueError, KeyError):
+            self._remove(tmp)
+            if vectors_file:
+                self._remove(vectors_file)
+            return
+        os.replace(self._path(tmp), self._path("chunks.json"))
+
+    def _upload(self, previous: Optional[str]) -> None:
+        try:
+            self.bucket.blob(f"{self.remote_prefix}/{self.vectors_file}").upload_from_filename(self._path(self.vectors_file))
+            self.bucket.blob(f"{self.remote_prefix}/chunks.json").upload_from_filename(self._path("chunks.json"))
+            if previous and previous != self.vectors_file:
+                self.bucket.blob(f"{self.remote_prefix}/{previous}").delete()
+        except NotFound:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not mirror vector index for {self.startup_name}: {str(e)}")
+
+    def refresh(self) -> "LocalVectorIndex":
+        """Bring the index up to date with the startup's extracted documents"""
+        with self._locked():
+            return self._refresh()
+
+    def _refresh(self) -> "LocalVectorIndex":
+        if self._read_local() is None:
+            self._download()
+        self._load_local()
+
+        sources = list_extractions(self.bucket, self.startup_name)
+        if sources == self.sources:
+            return self
+        chunks = load_chunks(self.bucket, sources, self.chunk_words, self.chunk_overlap)
+
+        known = {c["hash"]: row for row, c in enumerate(self.chunks)}
+        is_known = np.array([c["hash"] in known for c in chunks], dtype=bool)
+        missing = [c["text"] for c in chunks if c["hash"] not in known]
+        embedded = self.embedder.embed(missing) if missing else None
+
+        generation = uuid.uuid4().hex
+        vectors_file = f"vectors-{generation}.f32"
+        if chunks:
+            out = np.memmap(self._path(vectors_file), dtype=np.float32, mode="w+", shape=(len(chunks), self.embedder.dim))
+            if is_known.any():
+                out[is_known] = self.vectors[[known[c["hash"]] for c in chunks if c["hash"] in known]]
+            if embedded is not None:
+                out[~is_known] = embedded
+            out.flush()
+            del out
+        else:
+            open(self._path(vectors_file), "wb").close()
+        tmp = f"chunks.json.{generation}.tmp"
+        with open(self._path(tmp), "w") as f:
+            json.dump({"embedder": self.embedder.name, "vectors": vectors_file, "sources": sources, "chunks": chunks}, f)
+        os.replace(self._path(tmp), self._path("chunks.json"))
+
+        # Processes still mapping the previous vectors keep reading them after the unlink
+        previous = self.vectors_file
+        self._load_local()
+        if previous and previous != self.vectors_file:
+            self._remove(previous)
+        self._upload(previous)
+        logger.info(f"Vector index for {self.startup_name}: {len(chunks)} chunks, {len(missing)} newly embedded")
+        return self
+
+    def search(self, query: str, top_k: int = 10, min_similarity: float = 0.0) -> List[Dict[str, Any]]:
+        """The top_k chunks most similar to query (cosine), best first"""
+        if not self.chunks:
+            return []
+        scores = np.asarray(self.vectors @ self.embedder.embed([query])[0])
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "text": self.chunks[i]["text"],
+                "source": self.chunks[i]["source"],
+                "page": self.chunks[i]["page"],
+                "score": round(float(scores[i]), 4),
+            }
+            for i in top if scores[i] >= min_similarity
+        ]
+
+
+# One index per startup per process; a worker process handles a single request
+_indexes: Dict[str, LocalVectorIndex] = {}
+_embedder: Optional[Embedder] = None
+
+
+def get_local_index(startup_name: str) -> LocalVectorIndex:
+    global _embedder
+    if startup_name not in _indexes:
+        if _embedder is None:
+            _embedder = get_embedder(settings.retrieval.embedder, settings.retrieval.embedding_model)
+        _indexes[startup_name] = LocalVectorIndex(
+            startup_name,
+            _embedder,
+            settings.gcp.bucket_name,
+            settings.retrieval.index_dir,
+            chunk_words=settings.retrieval.chunk_words,
+            chunk_overlap=settings.retrieval.chunk_overlap,
+        ).refresh()
+    return _indexes[startup_name]
@@ -0,0 +1,56 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PREFIX = "manifests"
+
+
+class ManifestWriter:
+    """Maintains the per-upload completion manifest (manifests/<upload_id>.json) that the
+    gateway reads to resolve every artifact of an upload with a single object read."""
+
+    def __init__(self, bucket_name: str, max_attempts: int = 10):
+        self.storage_client = storage.Client()
+        self.bucket = self.storage_client.bucket(bucket_name)
+        self.max_attempts = max_attempts
+
+    def record(self, upload_id: str, startup_name: str, key: str, entry: Dict[str, Any]) -> None:
+        """Merge entry under manifest[key].
+
+        Both workers write the same object, so every write is conditional on the
+        generation that was read; a concurrent write makes us re-read and merge again.
+        """
+        blob_name = f"{MANIFEST_PREFIX}/{upload_id}.json"
+        for attempt in range(1, self.max_attempts + 1):
+            existing = self.bucket.get_blob(blob_name)
+            generation = existing.generation if existing else 0
+            manifest: Optional[Dict[str, Any]] = None
+            try:
+                if existing:
+                    manifest = json.loads(existing.download_as_bytes(if_generation_match=generation))
+            except PreconditionFailed:
+                continue
+
+            manifest = manifest or {"upload_id": upload_id, "startup_name": startup_name}
+            manifest[key] = dict(entry, updated_at=datetime.utcnow().isoformat())
+
+            blob = self.bucket.blob(blob_name)
+            blob.cache_control = "no-store"
+            try:
+                blob.upload_from_string(
+                    json.dumps(manifest),
+                    content_type="application/json",
+                    if_generation_match=generation,
+                )
+                logger.info(f"Updated manifest {blob_name} with '{key}' (attempt {attempt})")
+                return
+            except PreconditionFailed:
+                logger.info(f"Manifest {blob_name} changed concurrently, retrying merge")
+
+        raise RuntimeError(f"Could not update manifest {blob_name} after {self.max_attempts} attempts")
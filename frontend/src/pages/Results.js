@@ -26,6 +26,9 @@ const Results = () => {
   const imagePollingRef = useRef(null);
   const pdfPollingRef = useRef(null);
   const processingTimerRef = useRef(null);
+  const eventSourceRef = useRef(null);
+  const imagesDoneRef = useRef(false);
+  const pdfDoneRef = useRef(false);
 
   const API_BASE_URL = process.env.REACT_APP_API_BASE_URL;
   useEffect(() => {
@@ -36,8 +39,12 @@ const Results = () => {
     }
     
     setUploadId(id);
-    pollImageAPI(id);
-    pollPdfAPI(id);
+    if (window.EventSource) {
+      subscribeToStatusStream(id);
+    } else {
+      pollImageAPI(id);
+      pollPdfAPI(id);
+    }
     
     // Start processing timer
     processingTimerRef.current = setInterval(() => {
@@ -45,6 +52,10 @@ const Results = () => {
     }, 1000);
 
     return () => {
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+        eventSourceRef.current = null;
+      }
       if (processingTimerRef.current) {
         clearInterval(processingTimerRef.current);
         processingTimerRef.current = null;
@@ -66,6 +77,72 @@ const Results = () => {
     return `${mins}:${secs.toString().padStart(2, '0')}`;
   };
 
+  const showImages = (urls) => {
+    imagesDoneRef.current = true;
+    setImages((urls || []).map((url, index) => ({
+      id: index + 1,
+      url,
+      title: getImageTitle(index),
+      description: getImageDescription(index),
+    })));
+    setIsLoadingImages(false);
+  };
+
+  const showPdf = (url) => {
+    pdfDoneRef.current = true;
+    setPdfData({
+      url: url || null,
+      filename: 'report.pdf',
+      pages: 'N/A',
+      size: 'N/A',
+      generatedAt: new Date().toISOString(),
+    });
+    setIsLoadingPdf(false);
+  };
+
+  // Server pushes stage transitions; falls back to polling if the stream drops
+  const subscribeToStatusStream = (id) => {
+    const source = new EventSource(`${API_BASE_URL}/status/stream/?upload_id=${encodeURIComponent(id)}`);
+    eventSourceRef.current = source;
+
+    source.addEventListener('images_ready', (e) => showImages(JSON.parse(e.data).download_url));
+    source.addEventListener('pdf_ready', (e) => showPdf(JSON.parse(e.data).download_url));
+    source.addEventListener('images_failed', () => {
+      imagesDoneRef.current = true;
+      setImageError('Image generation failed. Please try uploading again or contact support.');
+      setIsLoadingImages(false);
+    });
+    source.addEventListener('pdf_failed', () => {
+      pdfDoneRef.current = true;
+      setPdfError('PDF report generation failed. Please try uploading again or contact support.');
+      setIsLoadingPdf(false);
+    });
+
+    // The job failed before reaching the workers (or expired); nothing more will arrive
+    source.addEventListener('failed', () => {
+      source.close();
+      eventSourceRef.current = null;
+      if (!imagesDoneRef.current) {
+        imagesDoneRef.current = true;
+        setImageError('Image generation failed. Please try uploading again or contact support.');
+        setIsLoadingImages(false);
+      }
+      if (!pdfDoneRef.current) {
+        pdfDoneRef.current = true;
+        setPdfError('PDF report generation failed. Please try uploading again or contact support.');
+        setIsLoadingPdf(false);
+      }
+    });
+
+    source.onerror = () => {
+      // The server closes the stream once everything is resolved; anything else is a dropped connection
+      source.close();
+      eventSourceRef.current = null;
+      if (!imagesDoneRef.current) pollImageAPI(id);
+      if (!pdfDoneRef.current) pollPdfAPI(id);
+    };
+  };
+
 // Replace your pollImageAPI with this
 const pollImageAPI = (id) => {
   const maxPolls = 180;